@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wsadowe wywołanie modeli kalkulatorów: scenariusze JSONL na stdin → wyniki JSONL na stdout.
+
+- Model: runtime (runtime_model.evaluate – stały prąd), segments (runtime_model.evaluate_segments
+  – prąd zależny od napięcia), calibration (calibration_model.evaluate), solar (solar_model.evaluate).
+- Wiersz wejścia = obiekt JSON z argumentami funkcji modelu (nazwy jak w sygnaturze, brakujące =
+  domyślne); opcjonalne "id" przepisywane do wyniku (domyślnie numer wiersza). Argumenty
+  wewnętrzne (INTERNAL_ARGS, np. prof – obiekt Profiler, oraz nazwy od "_") są odrzucane.
+- Wiersz wyjścia: {"id": …, "ok": true, "result": {…}} albo {"id": …, "ok": false, "error": "…"};
+  błąd jednego scenariusza nie przerywa partii. Wyniki w kolejności wejścia, flush po każdym
+  wierszu (strumień dla procesu nadrzędnego). inf/nan jako napisy "inf"/"-inf"/"nan".
+- Jeden proces na tysiące scenariuszy: model importowany raz, NumPy dopiero przy pierwszym
+  scenariuszu, który go potrzebuje; powtórzenia z pamięci wyników (result_cache).
+
+Przykład:
+  printf '{"id": "a", "current_mA": 0.2, "capacity_mAh": 800}\\n' | python tools/batch.py solar
+  python tools/batch.py runtime --defaults '{"capacity_mAh": 500}' < prady.jsonl > wyniki.jsonl
+"""
+
+import argparse
+import importlib
+import json
+import math
+import sys
+
+MODELS = {
+    "runtime": ("runtime_model", "evaluate"),
+    "segments": ("runtime_model", "evaluate_segments"),
+    "calibration": ("calibration_model", "evaluate"),
+    "solar": ("solar_model", "evaluate"),
+}
+INTERNAL_ARGS = frozenset({"prof"})     # obiekty Pythona, nie wartości ze scenariusza JSON
+
+
+def load_model(name):
+    """Funkcja modelu wg nazwy z MODELS."""
+    module, func = MODELS[name]
+    return getattr(importlib.import_module(module), func)
+
+
+def jsonable(x):
+    """Wynik modelu → typy JSON (skalary i tablice NumPy, krotki, inf/nan jako napisy)."""
+    if isinstance(x, dict):
+        return {str(k): jsonable(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [jsonable(v) for v in x]
+    if hasattr(x, "tolist"):                       # NumPy (skalar lub tablica)
+        return jsonable(x.tolist())
+    if isinstance(x, float) and not math.isfinite(x):
+        return str(x)
+    return x
+
+
+def run_jsonl(func, fin=sys.stdin, fout=sys.stdout, defaults=None):
+    """Scenariusze JSONL z fin → wyniki JSONL do fout; zwraca (ok, błędy)."""
+    ok = bad = 0
+    for lineno, line in enumerate(fin, 1):
+        if not line.strip():
+            continue
+        sid = lineno
+        try:
+            scen = json.loads(line)
+            if not isinstance(scen, dict):
+                raise ValueError("wiersz musi być obiektem JSON")
+            sid = scen.pop("id", lineno)
+            args = {**(defaults or {}), **scen}
+            internal = sorted(k for k in args if k.startswith("_") or k in INTERNAL_ARGS)
+            if internal:
+                raise ValueError(f"argumenty wewnętrzne niedozwolone: {', '.join(internal)}")
+            out = {"id": sid, "ok": True, "result": jsonable(func(**args))}
+            ok += 1
+        except Exception as e:                      # błąd scenariusza → wiersz błędu, partia biegnie dalej
+            out = {"id": sid, "ok": False, "error": f"{type(e).__name__}: {e}"}
+            bad += 1
+        fout.write(json.dumps(out, ensure_ascii=False) + "\n")
+        fout.flush()
+    return ok, bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Modele kalkulatorów: scenariusze JSONL (stdin) → wyniki JSONL (stdout).")
+    ap.add_argument("model", choices=sorted(MODELS), help="model do wywołania")
+    ap.add_argument("--defaults", default=None, help="obiekt JSON z argumentami wspólnymi dla wszystkich scenariuszy")
+    a = ap.parse_args(argv)
+
+    defaults = json.loads(a.defaults) if a.defaults else None
+    ok, bad = run_jsonl(load_model(a.model), sys.stdin, sys.stdout, defaults)
+    print(f"[{a.model}] scenariuszy: {ok + bad}, błędów: {bad}", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark i kontrola regresji kalkulatorów z tools/ (wywołania funkcji, bez input()).
+
+- Przypadki: segment_time (runtime_model), compute_calibration + apply_calibration i fit_batch
+  (calibration_model), profile_soc (symulacja sezonowa z solar_model), dark_streak oraz
+  solar_sweep.sweep (siatka n punktów, 1 proces).
+- Rozmiary: od pojedynczego scenariusza do 10^5 punktów (--sizes); przypadki skalarne
+  (pętla wywołań) mają własny limit rozmiaru (max_n), wektorowe idą do końca siatki.
+- Pomiar: najlepszy z powtórzeń (co najmniej --min-time s łącznie) → czas i przepustowość
+  [scenariusze/s]; szczytowa pamięć z tracemalloc w osobnym przebiegu (bez wpływu na czas).
+- Pamięć wyników (result_cache) wyłączona na czas pomiarów.
+- Wyniki referencyjne (bench_reference.json obok skryptu): dla każdego przypadku i rozmiaru
+  suma, min, max i próbka wartości → przyspieszenie musi dawać te same liczby
+  (rtol --rtol). --update-reference zapisuje bieżące wyniki jako referencję.
+- Raport JSON (metadane maszyny + wyniki) na stdout lub -o; --compare stary.json wypisuje
+  zmianę czasu względem poprzedniej wersji. Kod wyjścia 1, gdy wynik odbiega od referencji.
+
+Przykład:
+  python tools/bench.py -o bench_new.json --compare bench_old.json
+  python tools/bench.py --cases segment_time,sweep --sizes 1,1000,100000
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import calibration_model
+import result_cache
+import solar_sweep
+from runtime_model import segment_time
+from solar_model import (BASE_PSH_MONTH, DAYS_IN_MONTH, battery_mWh, consumption_mWh_day, dark_streak,
+                         profile_soc)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = os.path.join(HERE, "bench_reference.json")
+SIZES = (1, 10, 100, 1000, 10000, 100000)
+SAMPLE = 32          # wartości próbki w referencji
+SEED = 12345
+
+
+# --- przypadki: setup(n) → argumenty, run(argumenty) → tablica wyników ---
+
+def _segment_setup(n, rng):
+    cap = rng.uniform(200, 3000, n)
+    cur = rng.uniform(0.05, 0.5, (n, 4)) * [1.0, 0.9, 0.85, 0.8]
+    return cap, cur
+
+
+def _segment_run(args):
+    cap, cur = args
+    u = [4.2, 3.7, 3.5, 3.3]
+    return np.array([segment_time(float(c), u, i.tolist()) for c, i in zip(cap, cur)])
+
+
+def _calib_setup(n, rng):
+    k = rng.uniform(1.9, 2.1, n)
+    b = rng.uniform(-30, 30, n)
+    raw1 = (4200.0 - b) / k + rng.normal(0, 2, n)
+    raw2 = (3300.0 - b) / k + rng.normal(0, 2, n)
+    raw = rng.uniform(1400, 2200, (n, 8))
+    return calibration_model, raw1, raw2, raw
+
+
+def _calib_run(args):
+    mod, raw1, raw2, raw = args
+    out = np.empty((raw1.size, 2 + raw.shape[1]))
+    for j in range(raw1.size):
+        K, BmV = mod.compute_calibration(float(raw1[j]), float(raw2[j]), 4200.0, 3300.0)
+        out[j, 0], out[j, 1] = K, BmV
+        out[j, 2:] = [mod.apply_calibration(float(r), K, BmV) for r in raw[j]]
+    return out
+
+
+def _fit_setup(n, rng):
+    boards = np.repeat(np.arange(n), 6).astype(str)
+    ref = np.tile(np.linspace(3000.0, 4200.0, 6), n)
+    k = np.repeat(rng.uniform(1.9, 2.1, n), 6)
+    raw = ref / k + rng.normal(0, 1.5, ref.size)
+    return calibration_model.fit_batch, boards, ref, raw
+
+
+def _fit_run(args):
+    fit_batch, boards, ref, raw = args
+    r = fit_batch(boards, ref, raw)
+    return np.column_stack((r["K"], r["BmV"], r["rms_mV"]))
+
+
+def _scenarios(n, rng):
+    return (rng.uniform(0.02, 0.5, n), rng.uniform(200, 3000, n),
+            rng.uniform(0.05, 0.5, n), rng.uniform(0.03, 0.2, n))
+
+
+def _profile_setup(n, rng):
+    return _scenarios(n, rng), BASE_PSH_MONTH, DAYS_IN_MONTH
+
+
+def _profile_run(args):
+    (p, cap, cur, eff), psh, days = args
+    out = np.empty((p.size, 3))
+    for j in range(p.size):
+        harvest = [float(p[j]) * 1000.0 * psh[m] * float(eff[j]) for m in range(12)]
+        soc_min, min_month, _, ss = profile_soc(harvest, consumption_mWh_day(float(cur[j])),
+                                                battery_mWh(float(cap[j])), days)
+        out[j] = soc_min, min_month, ss.soc_min
+    return out
+
+
+def _dark_setup(n, rng):
+    p, _, cur, eff = _scenarios(n, rng)
+    return p, consumption_mWh_day(cur), eff * 100.0
+
+
+def _dark_run(args):
+    p, cons, eff_pct = args
+    return np.column_stack(dark_streak(p, cons, 14, 0.5, eff_pct))
+
+
+def _sweep_setup(n, rng):
+    return np.linspace(0.01, 0.5, n)
+
+
+def _sweep_run(panel):
+    cols = solar_sweep.sweep(panel, [500.0], [0.162], [5.0], [7], workers=1)
+    return np.column_stack([np.asarray(cols[c], float) for c in solar_sweep.COLUMNS[5:]])
+
+
+CASES = {
+    # nazwa: (setup, run, max_n)
+    "segment_time": (_segment_setup, _segment_run, 10000),
+    "calibration": (_calib_setup, _calib_run, 10000),
+    "fit_batch": (_fit_setup, _fit_run, None),
+    "profile_soc": (_profile_setup, _profile_run, 10000),
+    "dark_streak": (_dark_setup, _dark_run, None),
+    "sweep": (_sweep_setup, _sweep_run, None),
+}
+
+
+# --- pomiar i referencja ---
+
+def _num(x):
+    # JSON bez Infinity/NaN
+    x = float(x)
+    return x if np.isfinite(x) else str(x)
+
+
+def fingerprint(out):
+    """Skrót wyników: rozmiar, suma, min, max i równomierna próbka wartości."""
+    a = np.asarray(out, dtype=float).ravel()
+    fin = a[np.isfinite(a)]
+    pick = np.unique(np.linspace(0, a.size - 1, min(SAMPLE, a.size)).astype(int)) if a.size else []
+    return {
+        "size": int(a.size),
+        "sum": _num(fin.sum()) if fin.size else 0.0,
+        "min": _num(a.min()) if a.size else 0.0,
+        "max": _num(a.max()) if a.size else 0.0,
+        "sample": [_num(v) for v in a[pick]],
+    }
+
+
+def same_output(fp, ref, rtol):
+    if fp["size"] != ref["size"] or len(fp["sample"]) != len(ref["sample"]):
+        return False
+    a = np.array([float(fp[k]) for k in ("sum", "min", "max")] + [float(v) for v in fp["sample"]])
+    b = np.array([float(ref[k]) for k in ("sum", "min", "max")] + [float(v) for v in ref["sample"]])
+    return bool(np.allclose(a, b, rtol=rtol, atol=1e-9, equal_nan=True))
+
+
+def measure(setup, run, n, min_time):
+    """→ (najlepszy czas [s], powtórzeń, szczyt pamięci [B], wyniki)."""
+    args = setup(n, np.random.default_rng(SEED))
+    best, reps, spent = float("inf"), 0, 0.0
+    while reps < 1 or (spent < min_time and reps < 50):
+        t0 = time.perf_counter()
+        out = run(args)
+        dt = time.perf_counter() - t0
+        best, reps, spent = min(best, dt), reps + 1, spent + dt
+    tracemalloc.start()
+    run(args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, reps, peak, out
+
+
+def machine_info():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                             text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git": rev, "python": platform.python_version(), "numpy": np.__version__,
+        "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+    }
+
+
+def run_suite(cases, sizes, min_time=0.2, reference=None, rtol=1e-9, log=sys.stderr):
+    """Wszystkie przypadki × rozmiary → (lista wyników, słownik odcisków wyników)."""
+    results, prints = [], {}
+    enabled = result_cache.DEFAULT.enabled
+    result_cache.DEFAULT.enabled = False
+    try:
+        for name in cases:
+            setup, run, max_n = CASES[name]
+            for n in sizes:
+                if max_n is not None and n > max_n:
+                    continue
+                best, reps, peak, out = measure(setup, run, n, min_time)
+                key = f"{name}/{n}"
+                prints[key] = fp = fingerprint(out)
+                ref = (reference or {}).get(key)
+                check = "new" if ref is None else ("ok" if same_output(fp, ref, rtol) else "MISMATCH")
+                results.append({"case": name, "n": n, "seconds": best, "repeats": reps,
+                                "per_second": n / best if best > 0 else None,
+                                "peak_kib": round(peak / 1024.0, 1), "reference": check})
+                if log:
+                    print(f"{key:<22} {best * 1e3:>10.3f} ms {n / best:>12.0f}/s "
+                          f"{peak / 1024.0:>10.1f} KiB  {check}", file=log)
+    finally:
+        result_cache.DEFAULT.enabled = enabled
+    return results, prints
+
+
+def compare(new, old, out=sys.stderr):
+    """Czas bieżący / poprzedni dla wspólnych (przypadek, n)."""
+    prev = {(r["case"], r["n"]): r for r in old.get("results", [])}
+    print(f"\n=== Porównanie z {old.get('machine', {}).get('git') or 'poprzednim raportem'} ===", file=out)
+    for r in new:
+        o = prev.get((r["case"], r["n"]))
+        if o:
+            ratio = r["seconds"] / o["seconds"] if o["seconds"] > 0 else float("nan")
+            print(f"{r['case'] + '/' + str(r['n']):<22} {o['seconds'] * 1e3:>10.3f} → "
+                  f"{r['seconds'] * 1e3:>10.3f} ms  ×{ratio:.2f}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark i kontrola regresji kalkulatorów tools/.")
+    ap.add_argument("--cases", default=",".join(CASES), help=f"przypadki ({', '.join(CASES)})")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="rozmiary scenariuszy")
+    ap.add_argument("--min-time", type=float, default=0.2, help="minimalny łączny czas powtórzeń [s]")
+    ap.add_argument("--rtol", type=float, default=1e-9, help="tolerancja względna wobec referencji")
+    ap.add_argument("--reference", default=REFERENCE, help="plik wyników referencyjnych")
+    ap.add_argument("--update-reference", action="store_true", help="zapisz bieżące wyniki jako referencję")
+    ap.add_argument("--compare", default=None, help="poprzedni raport JSON do porównania czasów")
+    ap.add_argument("-o", "--output", default="-", help="raport JSON (domyślnie stdout)")
+    a = ap.parse_args(argv)
+
+    cases = [c for c in a.cases.split(",") if c]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        ap.error(f"nieznane przypadki: {', '.join(unknown)}")
+    sizes = [int(float(s)) for s in a.sizes.split(",") if s]
+    reference = {}
+    if os.path.exists(a.reference) and not a.update_reference:
+        with open(a.reference, encoding="utf-8") as fh:
+            reference = json.load(fh)
+
+    results, prints = run_suite(cases, sizes, a.min_time, reference, a.rtol)
+    report = {"machine": machine_info(), "rtol": a.rtol, "results": results}
+    text = json.dumps(report, indent=1, ensure_ascii=False)
+    if a.output == "-":
+        print(text)
+    else:
+        with open(a.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as fh:
+            compare(results, json.load(fh))
+    if a.update_reference:
+        if os.path.exists(a.reference):
+            with open(a.reference, encoding="utf-8") as fh:
+                prints = {**json.load(fh), **prints}
+        result_cache._atomic_write(os.path.abspath(a.reference),
+                                   (json.dumps(prints, indent=1, sort_keys=True) + "\n").encode("utf-8"))
+        print(f"Zapisano referencję: {a.reference} ({len(prints)} wpisów)", file=sys.stderr)
+    bad = [r for r in results if r["reference"] == "MISMATCH"]
+    if bad:
+        print(f"⚠️  {len(bad)} wyników odbiega od referencji.", file=sys.stderr)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
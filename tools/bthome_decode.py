@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dekoder BTHome v2 (bez szyfrowania) zgodny z reklamą budowaną w setup() (src/main.cpp).
+
+- decode(adv): jedna reklama (bytes/bytearray/memoryview) → słownik {nazwa: wartość};
+  parsowanie po memoryview bez kopiowania, tablica OBJECTS indeksowana ID obiektu.
+- decode_batch(buf, offsets, lengths): wiele reklam z jednego bufora → kolumny NumPy.
+  Reklamy o tej samej długości i układzie (flota tych samych czujników) dekodowane są
+  wektorowo: układ wyznaczany z pierwszej reklamy grupy, bajty strukturalne sprawdzane
+  dla całej grupy, wartości składane kolumnami. Reszta – dekodowanie pojedyncze.
+- encode(...): reklama jak z BtHomeV2Device (flagi + service data 0xFCD2 + nazwa),
+  do testów round-trip (tools/tests/test_bthome_decode.py); przepustowość: --bench.
+- Uszkodzone dane (ucięte struktury, obiekty, rekordy) → DecodeError, nigdy IndexError.
+"""
+
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+UUID_BTHOME = 0xFCD2
+AD_FLAGS, AD_NAME_SHORT, AD_NAME_COMPLETE, AD_SERVICE_DATA = 0x01, 0x08, 0x09, 0x16
+DEVICE_INFO_V2 = 0x40            # wersja 2, bez szyfrowania, wysyłka cykliczna
+FLAG_ENCRYPTED, FLAG_TRIGGER = 0x01, 0x04
+
+Obj = namedtuple("Obj", "name size signed factor")
+
+# ID obiektu → (nazwa, rozmiar [B], ze znakiem, mnożnik); wg specyfikacji BTHome v2
+_SPEC = {
+    0x00: ("packet_id", 1, False, 1), 0x01: ("battery", 1, False, 1),
+    0x02: ("temperature", 2, True, 0.01), 0x03: ("humidity", 2, False, 0.01),
+    0x04: ("pressure", 3, False, 0.01), 0x05: ("illuminance", 3, False, 0.01),
+    0x06: ("mass_kg", 2, False, 0.01), 0x07: ("mass_lb", 2, False, 0.01),
+    0x08: ("dewpoint", 2, True, 0.01), 0x09: ("count", 1, False, 1),
+    0x0A: ("energy", 3, False, 0.001), 0x0B: ("power", 3, False, 0.01),
+    0x0C: ("voltage", 2, False, 0.001), 0x0D: ("pm25", 2, False, 1),
+    0x0E: ("pm10", 2, False, 1), 0x12: ("co2", 2, False, 1), 0x13: ("tvoc", 2, False, 1),
+    0x14: ("moisture", 2, False, 0.01), 0x2E: ("humidity", 1, False, 1),
+    0x2F: ("moisture", 1, False, 1), 0x3A: ("button", 1, False, 1), 0x3C: ("dimmer", 2, False, 1),
+    0x3D: ("count", 2, False, 1), 0x3E: ("count", 4, False, 1), 0x3F: ("rotation", 2, True, 0.1),
+    0x40: ("distance_mm", 2, False, 1), 0x41: ("distance_m", 2, False, 0.1),
+    0x42: ("duration", 3, False, 0.001), 0x43: ("current", 2, False, 0.001),
+    0x44: ("speed", 2, False, 0.01), 0x45: ("temperature", 2, True, 0.1),
+    0x46: ("uv_index", 1, False, 0.1), 0x47: ("volume_l", 2, False, 0.1),
+    0x48: ("volume_ml", 2, False, 1), 0x49: ("volume_flow_rate", 2, False, 0.001),
+    0x4A: ("voltage", 2, False, 0.1), 0x4B: ("gas", 3, False, 0.001),
+    0x4C: ("gas", 4, False, 0.001), 0x4D: ("energy", 4, False, 0.001),
+    0x4E: ("volume", 4, False, 0.001), 0x4F: ("water", 4, False, 0.001),
+    0x50: ("timestamp", 4, False, 1), 0x51: ("acceleration", 2, False, 0.001),
+    0x52: ("gyroscope", 2, False, 0.001), 0x55: ("volume_storage", 4, False, 0.001),
+    0x56: ("conductivity", 2, False, 1), 0x57: ("temperature", 1, True, 1),
+    0x58: ("temperature", 1, True, 0.35), 0x59: ("count", 1, True, 1),
+    0x5A: ("count", 2, True, 1), 0x5B: ("count", 4, True, 1), 0x5C: ("power", 4, True, 0.01),
+    0x5D: ("current", 2, True, 0.001), 0x5E: ("direction", 2, False, 0.01),
+    0x5F: ("precipitation", 2, False, 1), 0x60: ("channel", 1, False, 1),
+    0xF0: ("device_type_id", 2, False, 1), 0xF1: ("firmware_version", 4, False, 1),
+    0xF2: ("firmware_version", 3, False, 1),
+}
+# czujniki binarne 0x0F..0x11 i 0x15..0x2D: 1 bajt 0/1
+_BINARY = ["generic_boolean", "power_on", "opening", None, None, None, "battery_low",
+           "battery_charging", "carbon_monoxide", "cold", "connectivity", "door",
+           "garage_door", "gas_detected", "heat", "light", "lock", "moisture_detected",
+           "motion", "moving", "occupancy", "plug", "presence", "problem", "running",
+           "safety", "smoke", "sound", "tamper", "vibration", "window"]
+for _i, _n in enumerate(_BINARY):
+    if _n:
+        _SPEC[0x0F + _i] = (_n, 1, False, 1)
+
+OBJECTS = [Obj(*_SPEC[i]) if i in _SPEC else None for i in range(256)]
+VARIABLE = {0x53: "text", 0x54: "raw"}      # długość w pierwszym bajcie danych
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def _ad_structures(mv):
+    # (typ AD, początek danych, koniec) dla kolejnych struktur AD
+    i, n = 0, len(mv)
+    while i < n:
+        ln = mv[i]
+        if ln == 0:
+            break
+        if i + 1 + ln > n:
+            raise DecodeError("Ucięta struktura AD.")
+        yield mv[i + 1], i + 2, i + 1 + ln
+        i += 1 + ln
+
+
+def _service_data(mv):
+    for typ, a, b in _ad_structures(mv):
+        if typ == AD_SERVICE_DATA and b - a >= 3 and mv[a] | (mv[a + 1] << 8) == UUID_BTHOME:
+            return a + 2, b
+    raise DecodeError("Brak service data BTHome (UUID 0xFCD2).")
+
+
+def iter_objects(adv):
+    """Generator (pozycja danych, id, Obj) obiektów BTHome; pozycje względem początku reklamy."""
+    mv = memoryview(adv)
+    a, b = _service_data(mv)
+    info = mv[a]
+    if info >> 5 != 2:
+        raise DecodeError(f"Nieobsługiwana wersja BTHome: {info >> 5}")
+    if info & FLAG_ENCRYPTED:
+        raise DecodeError("Reklama szyfrowana – brak klucza.")
+    i = a + 1
+    while i < b:
+        oid = mv[i]
+        obj = OBJECTS[oid]
+        if obj is None:
+            if oid in VARIABLE:
+                if i + 2 > b or i + 2 + mv[i + 1] > b:
+                    raise DecodeError("Ucięte dane obiektu o zmiennej długości.")
+                size = mv[i + 1]
+                yield i + 2, oid, Obj(VARIABLE[oid], size, False, None)
+                i += 2 + size
+                continue
+            raise DecodeError(f"Nieznany obiekt BTHome 0x{oid:02X}.")
+        if i + 1 + obj.size > b:
+            raise DecodeError("Ucięte dane obiektu.")
+        yield i + 1, oid, obj
+        i += 1 + obj.size
+
+
+def decode(adv):
+    """Dekoduje jedną reklamę → {nazwa: wartość}; powtórzone nazwy dostają sufiks _2, _3…"""
+    mv = memoryview(adv)
+    out = {}
+    for pos, _, obj in iter_objects(mv):
+        if obj.factor is None:
+            val = bytes(mv[pos:pos + obj.size])
+        else:
+            val = int.from_bytes(mv[pos:pos + obj.size], "little", signed=obj.signed)
+            if obj.factor != 1:
+                val = val * obj.factor
+        name, k = obj.name, 2
+        while name in out:
+            name, k = f"{obj.name}_{k}", k + 1
+        out[name] = val
+    return out
+
+
+def local_name(adv):
+    mv = memoryview(adv)
+    for typ, a, b in _ad_structures(mv):
+        if typ in (AD_NAME_SHORT, AD_NAME_COMPLETE):
+            return bytes(mv[a:b]).decode("utf-8", "replace")
+    return None
+
+
+# --- Wsadowo ---
+
+def _layout(frame):
+    # bajty strukturalne (wszystko poza danymi obiektów) i pola (nazwa, poz., Obj)
+    fields, data = [], np.zeros(len(frame), dtype=bool)
+    for pos, _, obj in iter_objects(frame):
+        if obj.factor is None:
+            raise DecodeError("Obiekt o zmiennej długości – dekodowanie pojedyncze.")
+        fields.append((obj.name, pos, obj))
+        data[pos:pos + obj.size] = True
+    return np.flatnonzero(~data), fields
+
+
+def _columns_fixed(mat, fields, cols, rows):
+    seen = set()
+    for name, pos, obj in fields:
+        base, k = name, 2
+        while name in seen:          # jak w decode(): temperature, temperature_2, …
+            name, k = f"{base}_{k}", k + 1
+        seen.add(name)
+        v = np.zeros(mat.shape[0], dtype=np.int64)
+        for k in range(obj.size - 1, -1, -1):
+            v = (v << 8) | mat[:, pos + k]
+        if obj.signed:
+            bits = 8 * obj.size
+            v = np.where(v >= 1 << (bits - 1), v - (1 << bits), v)
+        col = cols.setdefault(name, np.full(cols["valid"].shape[0], np.nan))
+        col[rows] = v * obj.factor if obj.factor != 1 else v
+
+
+def decode_batch(buf, offsets, lengths):
+    """
+    Dekoduje reklamy buf[offsets[i] : offsets[i]+lengths[i]] → słownik kolumn:
+    'valid' (bool) i po jednej kolumnie float na nazwę obiektu (NaN = brak obiektu).
+    Reklama wychodząca poza bufor jest nieważna (valid=False), jak każda uszkodzona.
+    """
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    n = offsets.shape[0]
+    cols = {"valid": np.zeros(n, dtype=bool)}
+    rest = []
+    inside = (offsets >= 0) & (lengths >= 0) & (offsets + lengths <= arr.size)
+    for L in np.unique(lengths[inside]):
+        rows = np.flatnonzero(inside & (lengths == L))
+        mat = arr[offsets[rows, None] + np.arange(L)]
+        todo = np.ones(rows.size, dtype=bool)
+        while todo.any():
+            first = np.flatnonzero(todo)[0]
+            try:
+                struct, fields = _layout(mat[first].tobytes())
+            except DecodeError:
+                rest.append(rows[first])
+                todo[first] = False
+                continue
+            same = todo & (mat[:, struct] == mat[first, struct]).all(axis=1)
+            sel = np.flatnonzero(same)
+            _columns_fixed(mat[sel], fields, cols, rows[sel])
+            cols["valid"][rows[sel]] = True
+            todo &= ~same
+    mv = memoryview(buf)
+    for r in rest:
+        try:
+            vals = decode(mv[offsets[r]:offsets[r] + lengths[r]])
+        except DecodeError:
+            continue
+        for name, v in vals.items():
+            if isinstance(v, bytes):
+                continue
+            cols.setdefault(name, np.full(n, np.nan))[r] = v
+        cols["valid"][r] = True
+    return cols
+
+
+def split_length_prefixed(buf):
+    """Bufor rekordów [długość u8][reklama]… → (offsets, lengths); ucięty rekord → DecodeError."""
+    mv = memoryview(buf)
+    offsets, lengths, i = [], [], 0
+    while i < len(mv):
+        ln = mv[i]
+        if i + 1 + ln > len(mv):
+            raise DecodeError(f"Ucięty rekord na pozycji {i}: długość {ln}, pozostało {len(mv) - i - 1} B.")
+        offsets.append(i + 1)
+        lengths.append(ln)
+        i += 1 + ln
+    return np.array(offsets, dtype=np.int64), np.array(lengths, dtype=np.int64)
+
+
+# --- Kodowanie (jak BtHomeV2Device w setup()) ---
+
+def encode(name="BT3", temperature=None, voltage=None, battery=None, count=None, trigger=False):
+    """Reklama BTHome v2: flagi, service data (temperatura 0.01, napięcie 0.001, bateria %, licznik u32), nazwa."""
+    data = bytearray([DEVICE_INFO_V2 | (FLAG_TRIGGER if trigger else 0)])
+    for oid, val in ((0x02, temperature), (0x0C, voltage), (0x01, battery), (0x3E, count)):
+        if val is None:
+            continue
+        obj = OBJECTS[oid]
+        raw = int(round(val / obj.factor))
+        data += bytes([oid]) + raw.to_bytes(obj.size, "little", signed=obj.signed)
+    svc = bytes([AD_SERVICE_DATA]) + UUID_BTHOME.to_bytes(2, "little") + data
+    nm = name.encode()
+    return (bytes([2, AD_FLAGS, 0x06]) + bytes([len(svc)]) + svc
+            + bytes([len(nm) + 1, AD_NAME_COMPLETE]) + nm)
+
+
+def _bench(n_bench=1_000_000):
+    import time
+    # przepustowość decode_batch dla floty reklam o jednym układzie
+    rng = np.random.default_rng(1)
+    temps = np.round(rng.uniform(-30, 40, n_bench), 2)
+    tmpl = encode("BT3", 0.0, 0.0, 0, 0)
+    L = len(tmpl)
+    big = np.tile(np.frombuffer(tmpl, dtype=np.uint8), n_bench).reshape(n_bench, L)
+    big[:, 9:11] = (np.round(temps * 100).astype(np.int16).view(np.uint8)).reshape(-1, 2)
+    t0 = time.perf_counter()
+    cols = decode_batch(big.tobytes(), np.arange(n_bench) * L, np.full(n_bench, L))
+    dt = time.perf_counter() - t0
+    assert cols["valid"].all() and np.allclose(cols["temperature"], temps)
+    print(f"decode_batch: {n_bench / dt / 1e6:.2f} mln reklam/s")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        _bench()
+    else:
+        for line in sys.stdin:
+            hexstr = line.strip().replace(" ", "")
+            if hexstr:
+                print(decode(bytes.fromhex(hexstr)))
@@ -1,18 +1,11 @@
 # calibrate_vbat_cli.py
 # Kalibracja: V_true = K * raw_mV + BmV
 # Punkty odniesienia domyślnie: 4.2 V (4200 mV) i 3.6 V (3600 mV) – można zmienić w promptach.
+# Tryb wsadowy (partia płytek, dowolna liczba punktów): --batch punkty.csv --out-dir cal/
 
-DEFAULT_V1_mV = 4200.0
-DEFAULT_V2_mV = 3600.0
-
-def _parse_number(s: str) -> float:
-    """Akceptuje kropkę/przecinek. Zwraca float."""
-    s = s.strip().lower().replace(',', '.')
-    import re
-    m = re.search(r'[-+]?\d+(?:\.\d+)?', s)
-    if not m:
-        raise ValueError("Nie podano liczby.")
-    return float(m.group(0))
+from calibration_model import (DEFAULT_V1_mV, DEFAULT_V2_mV, NONLINEAR_mV, OUTLIER_mV, parse_number,
+                               apply_calibration, compute_calibration, fit_batch, header_text,
+                               load_points)
 
 def _read_any_voltage(prompt: str, allow_empty_default: float | None = None) -> float:
     """
@@ -22,24 +15,56 @@ def _read_any_voltage(prompt: str, allow_empty_default: float | None = None) ->
     raw = input(prompt).strip()
     if raw == "" and allow_empty_default is not None:
         return allow_empty_default
-    v = _parse_number(raw)
+    v = parse_number(raw)
     if v < 20.0:  # wygląda na wolty
         v *= 1000.0
         print(f"(Wykryto jednostkę w V → przeliczone na {v:.1f} mV)")
     return v
 
-def compute_calibration(raw1_mV: float, raw2_mV: float,
-                        v1_mV: float, v2_mV: float):
-    if abs(raw2_mV - raw1_mV) < 1e-9:
-        raise ValueError("Surowe odczyty są identyczne — nie da się policzyć K.")
-    K = (v2_mV - v1_mV) / (raw2_mV - raw1_mV)
-    BmV = v1_mV - K * raw1_mV
-    return K, BmV
+def batch_main(argv) -> int:
+    import argparse
+    import os
+    import re
+    import sys
+    import time
+    ap = argparse.ArgumentParser(description="Kalibracja wsadowa VBAT (wiele płytek, wiele punktów).")
+    ap.add_argument("--batch", required=True, help="plik CSV/JSONL z punktami (board, ref_mV, raw_mV)")
+    ap.add_argument("--out-dir", default=None, help="katalog na nagłówki cal_<płytka>.h")
+    ap.add_argument("--outlier-mV", type=float, default=OUTLIER_mV)
+    ap.add_argument("--nonlinear-mV", type=float, default=NONLINEAR_mV)
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    boards, ref, raw = load_points(a.batch)
+    # jednostki jak w trybie interaktywnym: < 20 → wolty
+    ref = [v * 1000.0 if v < 20.0 else v for v in ref]
+    raw = [v * 1000.0 if v < 20.0 else v for v in raw]
+    r = fit_batch(boards, ref, raw, a.outlier_mV, a.nonlinear_mV)
+    if a.out_dir:
+        os.makedirs(a.out_dir, exist_ok=True)
+        for i in range(r["board"].size):
+            if r["ok"][i]:
+                name = re.sub(r"[^A-Za-z0-9_.-]", "_", str(r["board"][i]))
+                with open(os.path.join(a.out_dir, f"cal_{name}.h"), "w", encoding="utf-8") as fh:
+                    fh.write(header_text(r, i))
+    dt = time.perf_counter() - t0
 
-def apply_calibration(raw_mV: float, K: float, BmV: float) -> float:
-    return K * raw_mV + BmV
+    print("board,n,CAL_K,CAL_BmV,rms_mV,max_mV,outliers,bow_mV,status")
+    bad = 0
+    for i in range(r["board"].size):
+        status = ("za_malo_punktow" if not r["ok"][i] else "nieliniowy" if r["nonlinear"][i]
+                  else "odstajace" if r["outliers"][i] else "ok")
+        bad += status != "ok"
+        print(f"{r['board'][i]},{r['n'][i]},{r['K'][i]:.8f},{r['BmV'][i]:.2f},{r['rms_mV'][i]:.2f},"
+              f"{r['max_mV'][i]:.2f},{r['outliers'][i]},{r['bow_mV'][i]:.2f},{status}")
+    print(f"Płytek: {r['board'].size}, punktów: {len(ref)}, do sprawdzenia: {bad}, "
+          f"czas: {1000 * dt:.0f} ms", file=sys.stderr)
+    return 0
 
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        sys.exit(batch_main(sys.argv[1:]))
     try:
         # Referencje (domyślnie 4.2 V i 3.6 V)
         # Surowe odczyty z urządzenia dla tych referencji
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model kalibracji dzielnika VBAT (calibration-voltage-divider.py): V_true = K * raw_mV + BmV.
+
+- compute_calibration()/apply_calibration(): dwa punkty odniesienia (tryb interaktywny).
+- fit_batch(): najmniejsze kwadraty dla partii płytek (NumPy ładowany dopiero tutaj).
+- evaluate(): jeden scenariusz wsadowy (batch.py calibration), wartości w mV.
+- Import bez NumPy i bez input()/print().
+"""
+
+from result_cache import cached
+
+DEFAULT_V1_mV = 4200.0
+DEFAULT_V2_mV = 3600.0
+
+def parse_number(s: str) -> float:
+    """Akceptuje kropkę/przecinek. Zwraca float."""
+    s = s.strip().lower().replace(',', '.')
+    import re
+    m = re.search(r'[-+]?\d+(?:\.\d+)?', s)
+    if not m:
+        raise ValueError("Nie podano liczby.")
+    return float(m.group(0))
+
+@cached("compute_calibration/1")
+def compute_calibration(raw1_mV: float, raw2_mV: float,
+                        v1_mV: float, v2_mV: float):
+    if abs(raw2_mV - raw1_mV) < 1e-9:
+        raise ValueError("Surowe odczyty są identyczne — nie da się policzyć K.")
+    K = (v2_mV - v1_mV) / (raw2_mV - raw1_mV)
+    BmV = v1_mV - K * raw1_mV
+    return K, BmV
+
+def apply_calibration(raw_mV: float, K: float, BmV: float) -> float:
+    return K * raw_mV + BmV
+
+# --- Tryb wsadowy: cała partia płytek, dowolna liczba punktów na płytkę ---
+# python calibration-voltage-divider.py --batch punkty.csv [--out-dir cal/]
+# Wejście: CSV (board, ref_mV, raw_mV; nagłówek opcjonalny) lub JSONL
+# ({"board": ..., "ref_mV": ..., "raw_mV": ...}); wartości < 20 traktowane jak wolty.
+
+OUTLIER_mV = 15.0    # |reszta| powyżej progu → punkt odrzucony (dopasowanie powtórzone bez niego)
+MIN_FIT_POINTS = 2   # odrzucanie odstających nie schodzi poniżej tylu punktów na płytkę
+NONLINEAR_mV = 5.0   # odchylenie paraboli od prostej w zakresie pomiarów → dzielnik nieliniowy
+NONLINEAR_T = 4.0    # ...o ile człon x² jest istotny (|c|/σ_c), a nie tylko szumem
+
+def load_points(path: str):
+    """Punkty kalibracji z CSV/JSONL → (id płytek, ref_mV, raw_mV) jako listy."""
+    import csv
+    import json
+    boards, ref, raw = [], [], []
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if text.lstrip().startswith("{"):
+        for ln in text.splitlines():
+            if ln.strip():
+                d = json.loads(ln)
+                boards.append(str(d["board"]))
+                ref.append(float(d.get("ref_mV", d.get("ref"))))
+                raw.append(float(d.get("raw_mV", d.get("raw"))))
+    else:
+        delim = ";" if text.count(";") > text.count(",") else ","
+        for rec in csv.reader(text.splitlines(), delimiter=delim):
+            if len(rec) < 3:
+                continue
+            try:
+                r, w = parse_number(rec[1]), parse_number(rec[2])
+            except ValueError:
+                continue                                   # nagłówek
+            boards.append(rec[0].strip())
+            ref.append(r)
+            raw.append(w)
+    return boards, ref, raw
+
+def _fit_lines(idx, x, y, w, n_boards):
+    """Ważona prosta y = K·x + B per płytka (sumy przez bincount)."""
+    import numpy as np
+    s = lambda v: np.bincount(idx, weights=w * v, minlength=n_boards)
+    n, sx, sy, sxx, sxy = s(1.0), s(x), s(y), s(x * x), s(x * y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        den = n * sxx - sx * sx
+        K = (n * sxy - sx * sy) / den
+        B = (sy - K * sx) / n
+    return K, B, n
+
+@cached("fit_batch/2")
+def fit_batch(boards, ref_mV, raw_mV, outlier_mV=OUTLIER_mV, nonlinear_mV=NONLINEAR_mV):
+    """
+    CAL_K/CAL_BmV dla wielu płytek naraz (najmniejsze kwadraty, V_true = K·raw + B).
+    Dla 2 punktów wynik jak compute_calibration(). Zwraca słownik kolumn per płytka.
+    """
+    import numpy as np
+    ids, idx = np.unique(np.asarray(boards, dtype=str), return_inverse=True)
+    x = np.asarray(raw_mV, dtype=float)
+    y = np.asarray(ref_mV, dtype=float)
+    nb = ids.size
+    # środek x per płytka → lepsze uwarunkowanie sum
+    cnt = np.bincount(idx, minlength=nb)
+    xm = np.bincount(idx, weights=x, minlength=nb) / np.maximum(cnt, 1)
+    xc = x - xm[idx]
+
+    # punkty odstające: co krok odrzuć najgorszy punkt płytki (|reszta| > outlier_mV) i dopasuj
+    # ponownie – jeden punkt odstający nie ciągnie prostej tak, by odpadały też dobre punkty
+    w = np.ones_like(x)
+    while True:
+        K, B, n = _fit_lines(idx, xc, y, w, nb)
+        res = y - (K[idx] * xc + B[idx])
+        bad = np.where(w > 0, np.abs(res), 0.0)
+        worst = np.zeros(nb)
+        np.maximum.at(worst, idx, bad)
+        drop = (worst > outlier_mV) & (n > MIN_FIT_POINTS)
+        if not drop.any():
+            break
+        cand = np.flatnonzero(drop[idx] & (bad == worst[idx]))
+        w[cand[np.unique(idx[cand], return_index=True)[1]]] = 0.0     # jeden punkt na płytkę
+    out = w == 0
+
+    sq = lambda v: np.bincount(idx, weights=w * v, minlength=nb)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rms = np.sqrt(sq(res * res) / n)
+    max_abs = np.zeros(nb)
+    np.maximum.at(max_abs, idx, np.abs(res) * w)
+
+    # nieliniowość: współczynnik x² dopasowany do reszt (x² ortogonalizowane względem prostej)
+    Kq, Bq, _ = _fit_lines(idx, xc, xc * xc, w, nb)
+    q = xc * xc - (Kq[idx] * xc + Bq[idx])
+    sqq = sq(q * q)
+    ok3 = (n >= 4) & (sqq > 1e-9 * sq(xc ** 4))            # ≥ 3 różne odczyty
+    c = np.where(ok3, sq(res * q) / np.where(ok3, sqq, 1.0), 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt(np.maximum(sq(res * res) - c * c * sqq, 0.0) / (n - 3))
+        t_c = np.abs(c) * np.sqrt(sqq) / sigma            # istotność członu x² (t-Studenta)
+    lo = np.full(nb, np.inf)
+    hi = np.full(nb, -np.inf)
+    np.minimum.at(lo, idx, np.where(w > 0, x, np.inf))
+    np.maximum.at(hi, idx, np.where(w > 0, x, -np.inf))
+    bow = np.abs(c) * ((hi - lo) / 2.0) ** 2       # maks. odchylenie paraboli od cięciwy
+    return {
+        "board": ids, "n": n.astype(int), "K": K, "BmV": B - K * xm, "rms_mV": rms,
+        "max_mV": max_abs, "outliers": np.bincount(idx, weights=out, minlength=nb).astype(int),
+        "bow_mV": np.where(ok3, bow, np.nan), "nonlinear": ok3 & (bow > nonlinear_mV) & (t_c > NONLINEAR_T),
+        "ok": (n >= 2) & np.isfinite(K),
+    }
+
+def header_text(r: dict, i: int) -> str:
+    """Dwie stałe z src/main.cpp dla płytki i (plik nagłówkowy)."""
+    return (f"// Kalibracja VBAT – płytka {r['board'][i]}: {r['n'][i]} pkt, RMS {r['rms_mV'][i]:.2f} mV, "
+            f"max {r['max_mV'][i]:.2f} mV\n"
+            f"static constexpr float CAL_K   = {r['K'][i]:.8f}f;   // współczynnik kalibracji\n"
+            f"static constexpr float CAL_BmV = {r['BmV'][i]:.2f}f;       // offset kalibracji w mV\n")
+
+def evaluate(raw1_mV, raw2_mV, v1_mV=DEFAULT_V1_mV, v2_mV=DEFAULT_V2_mV, raw_mV=()):
+    """CAL_K/CAL_BmV z dwóch punktów + self-check i opcjonalnie skalibrowane odczyty raw_mV."""
+    K, BmV = compute_calibration(raw1_mV, raw2_mV, v1_mV, v2_mV)
+    return {
+        "K": K,
+        "BmV": BmV,
+        "check_mV": [apply_calibration(raw1_mV, K, BmV) - v1_mV, apply_calibration(raw2_mV, K, BmV) - v2_mV],
+        "calibrated_mV": [apply_calibration(r, K, BmV) for r in raw_mV],
+    }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model ogniwa: krzywa OCV → SoC zamiast liniowej frakcji pojemności 4.2→3.0 V.
+
+- Tabele OCV dla nazwanych typów ogniw (CELLS); domyślnie "fw" = lut z
+  estimate_battery_percent() w src/main.cpp, "linear" = dawny model liniowy
+  (fraction = (U_full - U) / (U_full - U_cutoff)), własne tabele z CSV (napięcie, SoC%).
+- SoC w tabeli = ładunek (procent pojemności), więc ładunek między napięciami to różnica SoC.
+- Indeks energii: skumulowana całka ∫U dSoC w węzłach tabeli (U liniowe w przedziale →
+  trapez jest dokładny) → energia między U_a i U_b oraz U(SoC) w O(log n) (bisect dla
+  skalarów, searchsorted/np.interp dla tablic). NumPy ładowany dopiero przy pierwszym
+  wywołaniu z tablicą (import modułu i ścieżki skalarne bez NumPy).
+- estimate_battery_percent(): wektorowy odpowiednik funkcji z firmware (float32, zaokrąglenie
+  jak (uint8_t)(p + 0.5f)) – zgodny bit w bit dla tabeli "fw".
+
+Przykład:
+  python tools/cell_model.py --cell fw 4.2 3.7 3.3 3.0
+"""
+
+import argparse
+import csv
+from bisect import bisect_left, bisect_right
+
+# lut z estimate_battery_percent() (src/main.cpp), rosnąco wg napięcia
+FW_OCV_V = (3.00, 3.10, 3.20, 3.25, 3.30, 3.35, 3.40, 3.45, 3.50, 3.55, 3.60, 3.65,
+            3.70, 3.75, 3.80, 3.85, 3.90, 3.95, 4.00, 4.05, 4.10, 4.15, 4.20)
+FW_OCV_PCT = (0, 1, 2, 3, 5, 7, 10, 14, 19, 24, 30, 36,
+              42, 48, 55, 62, 68, 74, 80, 85, 90, 95, 100)
+
+# Założenia napięciowe kalkulatorów
+U_FULL = 4.2
+U_SAFE = 3.3
+U_CUTOFF = 3.0
+
+
+class CellModel:
+    """Krzywa OCV ogniwa (napięcie rosnąco, SoC [%] niemalejąco) z indeksem energii."""
+
+    def __init__(self, name, v, soc_pct):
+        v = [float(x) for x in v]
+        s = [float(x) for x in soc_pct]
+        if len(v) < 2 or len(v) != len(s):
+            raise ValueError(f"{name}: tabela OCV wymaga co najmniej 2 par (U, SoC).")
+        if any(b <= a for a, b in zip(v, v[1:])) or any(b < a for a, b in zip(s, s[1:])):
+            raise ValueError(f"{name}: napięcia muszą rosnąć, a SoC nie może maleć.")
+        self.name = name
+        self.v = v
+        self.soc = s
+        # ∫U dSoC od początku tabeli [V·%] – trapez w każdym przedziale
+        e = [0.0]
+        for i in range(1, len(v)):
+            e.append(e[-1] + 0.5 * (v[i] + v[i - 1]) * (s[i] - s[i - 1]))
+        self.energy_idx = e
+        self._np = None
+
+    def _arrays(self):
+        # (np, U, SoC, energia, U f32, SoC f32) dla ścieżek wektorowych – przy pierwszym użyciu
+        if self._np is None:
+            import numpy as np
+            v, s = np.array(self.v), np.array(self.soc)
+            self._np = (np, v, s, np.array(self.energy_idx), v.astype(np.float32), s.astype(np.float32))
+        return self._np
+
+    def __repr__(self):
+        # deterministyczny (klucze result_cache)
+        return f"CellModel({self.name!r}, {self.v!r}, {self.soc!r})"
+
+    # --- napięcie ↔ SoC ---
+
+    def soc_pct(self, u):
+        """SoC [%] przy napięciu u [V] (interpolacja liniowa, obcięte do zakresu tabeli)."""
+        if isinstance(u, (int, float)):
+            v, s = self.v, self.soc
+            if u <= v[0]:
+                return s[0]
+            if u >= v[-1]:
+                return s[-1]
+            i = bisect_right(v, u)
+            return s[i - 1] + (u - v[i - 1]) * (s[i] - s[i - 1]) / (v[i] - v[i - 1])
+        np, v, s = self._arrays()[:3]
+        return np.interp(u, v, s)
+
+    def voltage_at(self, soc_pct):
+        """Napięcie OCV [V] przy SoC [%] (odwrotność soc_pct; płaskie odcinki → najniższe U)."""
+        if isinstance(soc_pct, (int, float)):
+            v, s = self.v, self.soc
+            if soc_pct <= s[0]:
+                return v[0]
+            if soc_pct >= s[-1]:
+                return v[-1]
+            i = bisect_left(s, soc_pct)
+            return v[i - 1] + (soc_pct - s[i - 1]) * (v[i] - v[i - 1]) / (s[i] - s[i - 1])
+        np, v, s = self._arrays()[:3]
+        x = np.asarray(soc_pct, dtype=float)
+        i = np.clip(np.searchsorted(s, x, "left"), 1, s.size - 1)
+        s0, s1, v0, v1 = s[i - 1], s[i], v[i - 1], v[i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = v0 + (x - s0) * (v1 - v0) / (s1 - s0)
+        return np.where(x <= s[0], v[0], np.where(x >= s[-1], v[-1], u))
+
+    # --- ładunek i energia ---
+
+    def charge_fraction(self, u_high, u_low):
+        """Część pojemności [0-1] oddana między u_high a u_low."""
+        return (self.soc_pct(u_high) - self.soc_pct(u_low)) / 100.0
+
+    def _energy_at(self, soc):
+        # ∫U dSoC od początku tabeli do soc [V·%]
+        if isinstance(soc, (int, float)):
+            s, v, e = self.soc, self.v, self.energy_idx
+            i = min(max(bisect_right(s, soc), 1), len(s) - 1)
+            u = self.voltage_at(soc)
+            return e[i - 1] + 0.5 * (v[i - 1] + u) * (soc - s[i - 1])
+        np, v, s, e = self._arrays()[:4]
+        soc = np.asarray(soc, dtype=float)
+        i = np.clip(np.searchsorted(s, soc, "right"), 1, s.size - 1)
+        return e[i - 1] + 0.5 * (v[i - 1] + self.voltage_at(soc)) * (soc - s[i - 1])
+
+    def energy_mWh(self, capacity_mAh, u_high, u_low):
+        """Energia ogniwa [mWh] oddana między u_high a u_low (przy napięciu OCV)."""
+        return capacity_mAh * (self._energy_at(self.soc_pct(u_high))
+                               - self._energy_at(self.soc_pct(u_low))) / 100.0
+
+    def mean_voltage(self, u_high, u_low):
+        """Średnie napięcie ogniwa w przedziale [V] (energia / ładunek)."""
+        return self.energy_mWh(1.0, u_high, u_low) / self.charge_fraction(u_high, u_low)
+
+    # --- odpowiednik firmware ---
+
+    def estimate_battery_percent(self, vbat):
+        """Jak estimate_battery_percent() w firmware: uint8 dla tablicy napięć [V]."""
+        np, _, _, _, v, s = self._arrays()
+        u = np.asarray(vbat, dtype=np.float32)
+        j = np.clip(np.searchsorted(v, u, "left"), 1, v.size - 1)   # v[j-1] < u <= v[j]
+        x = (u - v[j - 1]) / (v[j] - v[j - 1])
+        p = s[j - 1] + x * (s[j] - s[j - 1])
+        p = np.clip(p, np.float32(0), np.float32(100))
+        out = (p + np.float32(0.5)).astype(np.uint8)
+        out = np.where(u >= v[-1], np.uint8(s[-1]), out)
+        return np.where(u <= v[0], np.uint8(s[0]), out).astype(np.uint8)
+
+
+CELLS = {
+    "fw": CellModel("fw", FW_OCV_V, FW_OCV_PCT),
+    "linear": CellModel("linear", (U_CUTOFF, U_FULL), (0.0, 100.0)),
+}
+
+
+def load_ocv_csv(path, name=None):
+    """Tabela OCV z CSV: kolumny napięcie [V], SoC [%] (nagłówek opcjonalny)."""
+    rows = []
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    delim = ";" if ";" in text else ","
+    for rec in csv.reader(text.splitlines(), delimiter=delim):
+        try:
+            rows.append((float(rec[0].replace(",", ".")), float(rec[1].replace(",", "."))))
+        except (ValueError, IndexError):
+            continue                                     # nagłówek / pusta linia
+    rows.sort()
+    return CellModel(name or path, [r[0] for r in rows], [r[1] for r in rows])
+
+
+def get_cell(name="fw"):
+    """Model ogniwa wg nazwy z CELLS albo ścieżki do pliku CSV."""
+    if isinstance(name, CellModel):
+        return name
+    if name in CELLS:
+        return CELLS[name]
+    if name.lower().endswith(".csv"):
+        return load_ocv_csv(name)
+    raise ValueError(f"Nieznany typ ogniwa: {name} (dostępne: {', '.join(CELLS)} lub plik .csv)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Model ogniwa OCV: SoC, ładunek i energia.")
+    ap.add_argument("voltages", nargs="*", type=float, help="napięcia [V] do przeliczenia")
+    ap.add_argument("--cell", default="fw", help=f"typ ogniwa ({', '.join(CELLS)}) lub plik CSV")
+    ap.add_argument("--capacity", type=float, default=500, help="pojemność [mAh]")
+    a = ap.parse_args(argv)
+
+    cell = get_cell(a.cell)
+    print(f"=== Ogniwo '{cell.name}', {a.capacity:.0f} mAh ===")
+    for u_lo in (U_SAFE, U_CUTOFF):
+        print(f"{U_FULL} → {u_lo} V: {100 * cell.charge_fraction(U_FULL, u_lo):.1f}% pojemności, "
+              f"{cell.energy_mWh(a.capacity, U_FULL, u_lo):.0f} mWh "
+              f"(śr. {cell.mean_voltage(U_FULL, u_lo):.3f} V)")
+    for u in a.voltages:
+        print(f"{u:.3f} V → SoC {cell.soc_pct(u):.1f}% (firmware: {int(cell.estimate_battery_percent(u))}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analiza przebiegów prądu z analizatora mocy → I_points dla consumption-calc-4points.py.
+
+- Wejście: jeden przebieg na napięcie zasilania (np. 4.2=trace42.bin 3.7=trace37.csv …).
+  Binarny: surowe próbki (float32/float64/int16/…) – czytane przez np.memmap porcjami,
+  bez kopiowania całego pliku. CSV: porcjami po CHUNK_LINES wierszy (kolumna prądu
+  wybierana --column, opcjonalnie kolumna czasu do wyznaczenia częstotliwości próbkowania).
+- Detekcja: próg między dnem deep-sleep a impulsami wybudzenia (auto z pierwszej porcji
+  lub --threshold-mA); początek cyklu = przekroczenie progu po co najmniej --min-gap-ms ciszy.
+- Iavg liczone z ładunku pełnych cykli (od pierwszego do ostatniego początku cyklu),
+  stan przenoszony między porcjami → stała pamięć niezależnie od długości przebiegu.
+
+Przykład:
+  python tools/current_trace.py 4.2=t42.bin 3.7=t37.bin 3.5=t35.bin 3.3=t33.bin \\
+      --rate 100000 --dtype float32 --unit A --capacity 500
+"""
+
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from runtime_model import segment_time
+
+CHUNK_SAMPLES = 1 << 22      # próbek na porcję (binarnie)
+CHUNK_LINES = 1 << 18        # wierszy na porcję (CSV)
+UNIT_TO_MA = {"A": 1000.0, "mA": 1.0, "uA": 0.001}
+
+
+class TraceStats:
+    """Strumieniowa analiza przebiegu: kolejne porcje próbek [mA] przez feed()."""
+
+    def __init__(self, rate_hz, threshold_mA=None, min_gap_ms=200.0):
+        self.dt = 1.0 / rate_hz
+        self.threshold = threshold_mA
+        self.min_gap = int(round(min_gap_ms * 1e-3 * rate_hz))
+        self.n = 0                 # próbek przetworzonych
+        self.q_total = 0.0         # ładunek całkowity [mA·próbka]
+        self.last_above = -1       # indeks ostatniej próbki powyżej progu
+        self.n_starts = 0          # początków cykli
+        self.first_start = None    # (indeks, ładunek skumulowany) pierwszego i ostatniego początku
+        self.last_start = None
+        self.bursts = 0            # impulsy wybudzenia (także niepełny na początku przebiegu)
+        self.above_n = 0           # próbek powyżej progu (czas aktywny)
+        self.above_q = 0.0
+        self.floor = None
+
+    def _auto_threshold(self, x):
+        # dno snu ≈ 10. percentyl; próg: 5× dno, ale co najmniej dno + 0.5 mA
+        self.floor = float(np.percentile(x, 10))
+        self.threshold = max(5.0 * self.floor, self.floor + 0.5)
+
+    def feed(self, x):
+        x = np.asarray(x)
+        if x.size == 0:
+            return
+        if self.threshold is None:
+            self._auto_threshold(x)
+        csum = np.cumsum(x, dtype=np.float64)
+        above = x > self.threshold
+        ia = np.flatnonzero(above)
+        if ia.size:
+            gi = ia + self.n
+            prev = np.concatenate(([self.last_above], gi[:-1]))
+            is_new = (gi - prev) > self.min_gap
+            new = ia[is_new]
+            self.bursts += int(is_new.sum()) + int(self.last_above < 0 and not is_new[0])
+            # ładunek skumulowany przed próbką startu
+            q_at = self.q_total + csum[new] - x[new].astype(np.float64)
+            if new.size:
+                if self.first_start is None:
+                    self.first_start = (int(new[0]) + self.n, float(q_at[0]))
+                self.last_start = (int(new[-1]) + self.n, float(q_at[-1]))
+                self.n_starts += new.size
+            self.last_above = int(gi[-1])
+            self.above_n += ia.size
+            self.above_q += float(x[ia].sum(dtype=np.float64))
+        self.q_total += float(csum[-1])
+        self.n += x.size
+
+    def result(self):
+        """Słownik: Iavg [mA], liczba cykli, okres [s], czas i ładunek wybudzenia, dno snu."""
+        cycles = self.n_starts - 1
+        if cycles >= 1:
+            (i0, q0), (i1, q1) = self.first_start, self.last_start
+            i_avg = (q1 - q0) / (i1 - i0)
+            period = (i1 - i0) * self.dt / cycles
+        else:  # brak pełnego cyklu – średnia z całości
+            i_avg = self.q_total / max(self.n, 1)
+            period = float("nan")
+        n_bursts = max(self.bursts, 1)
+        sleep_n = self.n - self.above_n
+        return {
+            "i_avg_mA": i_avg,
+            "cycles": cycles,
+            "period_s": period,
+            "wake_ms": 1000.0 * self.above_n * self.dt / n_bursts,
+            "q_wake_mC": self.above_q * self.dt / n_bursts,
+            "sleep_floor_mA": (self.q_total - self.above_q) / sleep_n if sleep_n else float("nan"),
+            "threshold_mA": self.threshold,
+            "duration_s": self.n * self.dt,
+        }
+
+
+def iter_binary(path, dtype="float32", offset=0, scale=1.0, chunk=CHUNK_SAMPLES):
+    """
+    Porcje próbek [mA] z pliku binarnego (memmap, bez wczytywania całości).
+    Próbki skalowane w float32 (precyzja przyrządu), sumy liczone w float64.
+    """
+    mm = np.memmap(path, dtype=np.dtype(dtype), mode="r", offset=offset)
+    scale = np.float32(scale)
+    for i in range(0, mm.shape[0], chunk):
+        yield np.multiply(mm[i:i + chunk], scale, dtype=np.float32)
+
+
+def iter_csv(path, column=-1, scale=1.0, chunk=CHUNK_LINES):
+    """
+    Porcje próbek [mA] z CSV. Zwraca (generator, rate_hz z kolumny czasu lub None).
+    Kolumna 0 traktowana jako czas [s], jeśli plik ma więcej niż jedną kolumnę.
+    """
+    fh = open(path, encoding="utf-8", errors="replace")
+    first = fh.readline()
+    delim = max((",", ";", "\t"), key=first.count)
+    try:
+        float(first.split(delim)[column])
+        head = [first]                     # brak nagłówka
+    except ValueError:
+        head = []
+    probe = head + list(islice(fh, 2 - len(head)))
+    rate = None
+    if len(probe) == 2 and len(probe[0].split(delim)) > 1:
+        t0, t1 = (float(ln.split(delim)[0]) for ln in probe)
+        rate = 1.0 / (t1 - t0) if t1 > t0 else None
+
+    def gen():
+        try:
+            lines = probe + list(islice(fh, chunk))
+            while lines:
+                data = np.loadtxt(lines, delimiter=delim, usecols=(column % len(lines[0].split(delim)),),
+                                  dtype=np.float64, ndmin=1)
+                yield data * scale
+                lines = list(islice(fh, chunk))
+        finally:
+            fh.close()
+    return gen(), rate
+
+
+def analyze(path, rate_hz=None, dtype="float32", offset=0, unit="A", column=-1,
+            threshold_mA=None, min_gap_ms=200.0, lsb=1.0):
+    """Analizuje jeden plik (CSV po rozszerzeniu .csv/.txt, inaczej binarny)."""
+    scale = UNIT_TO_MA[unit] * lsb
+    if os.path.splitext(path)[1].lower() in (".csv", ".txt"):
+        chunks, rate_csv = iter_csv(path, column, scale)
+        rate_hz = rate_hz or rate_csv
+    else:
+        chunks = iter_binary(path, dtype, offset, scale)
+    if not rate_hz:
+        raise ValueError(f"{path}: podaj --rate (częstotliwość próbkowania).")
+    st = TraceStats(rate_hz, threshold_mA, min_gap_ms)
+    for x in chunks:
+        st.feed(x)
+    return st.result()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Analiza przebiegów prądu → I_points dla segment_time().")
+    ap.add_argument("traces", nargs="+", help="NAPIĘCIE=plik, np. 4.2=t42.bin")
+    ap.add_argument("--rate", type=float, default=None, help="częstotliwość próbkowania [Hz]")
+    ap.add_argument("--dtype", default="float32", help="typ próbek binarnych (np. float32, int16)")
+    ap.add_argument("--offset", type=int, default=0, help="nagłówek pliku binarnego [B]")
+    ap.add_argument("--unit", default="A", choices=sorted(UNIT_TO_MA), help="jednostka próbek (po --lsb)")
+    ap.add_argument("--lsb", type=float, default=1.0, help="mnożnik próbki surowej (np. dla int16)")
+    ap.add_argument("--column", type=int, default=-1, help="kolumna prądu w CSV")
+    ap.add_argument("--threshold-mA", type=float, default=None, help="próg wybudzenia [mA] (domyślnie auto)")
+    ap.add_argument("--min-gap-ms", type=float, default=200.0, help="min. cisza między cyklami [ms]")
+    ap.add_argument("--capacity", type=float, default=None, help="pojemność [mAh] → czas pracy z segment_time()")
+    a = ap.parse_args(argv)
+
+    points = {}
+    for spec in a.traces:
+        u, _, path = spec.partition("=")
+        t0 = time.perf_counter()
+        r = analyze(path, a.rate, a.dtype, a.offset, a.unit, a.column, a.threshold_mA,
+                    a.min_gap_ms, a.lsb)
+        dt = time.perf_counter() - t0
+        points[float(u.replace(",", "."))] = r
+        print(f"[{u} V] {path}: {r['duration_s']:.0f} s w {dt:.2f} s — Iavg {r['i_avg_mA']:.4f} mA, "
+              f"cykli {r['cycles']}, okres {r['period_s']:.2f} s, wybudzenie {r['wake_ms']:.1f} ms / "
+              f"{r['q_wake_mC']:.3f} mC, sen {r['sleep_floor_mA']:.4f} mA")
+
+    U_points = sorted(points, reverse=True)
+    I_points = [points[u]["i_avg_mA"] for u in U_points]
+    print(f"\nU_points = {U_points}")
+    print(f"I_points = [{', '.join(f'{i:.4f}' for i in I_points)}]")
+    if a.capacity:
+        if len(U_points) < 2:
+            print("segment_time() wymaga co najmniej dwóch napięć.", file=sys.stderr)
+            return
+        time_h = segment_time(a.capacity, U_points, I_points, U_cutoff=min(U_points))
+        print(f"Czas pracy (segment_time, {a.capacity:.0f} mAh): {time_h:.1f} h (~{time_h / 24:.1f} dni)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model cyklu pracy firmware (src/main.cpp) i godzinowa symulacja SOC przez cały rok.
+
+Cykl wybudzenia wg setup():
+  start + init (Wi-Fi off) → zasilanie DS18B20 + delay(20) → pomiar DS18B20 (blokujące
+  requestTemperatures) → LED + delay(12) na RC dzielnika + N próbek ADC →
+  NimBLE init → repeats × (start reklamy, delay(10), stop) → NimBLE deinit →
+  deep sleep GPIO_DEEP_SLEEP_DURATION s.
+
+Prądy faz są orientacyjne (ESP32-C3 + LDO) – podmień na zmierzone (np. z analizatora
+prądu). Symulacja godzinowa jest generatorem: rok przechodzi porcjami (miesiąc godzin),
+pamięć nie rośnie z długością przebiegu.
+
+Przykład:
+  python tools/duty_cycle.py --years 10 --capacity 500 --panel 0.15 --eff 5 --sleep-s 300
+  python tools/duty_cycle.py --irradiance pvgis.csv --sleep-s 300
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from soc_sim import simulate_soc
+from runtime_model import format_time
+from solar_model import BASE_PSH_MONTH, DAYS_IN_MONTH, MONTH_NAMES_PL, V_SYS, battery_mWh
+
+# Stałe firmware (src/main.cpp)
+GPIO_DEEP_SLEEP_DURATION = 5     # [s]
+TX_DBM = 3                       # [dBm]
+BEACON_REPEATS = 3               # sendBeacon(..., 3)
+ADC_SAMPLES = 32                 # N w read_vbat_mV() (Arduino-ESP32 v3; v2: 64)
+
+FirmwareConfig = namedtuple(
+    "FirmwareConfig",
+    "sleep_s repeats tx_dbm adc_samples beacon_ms ds_powerup_ms ds_conv_ms adc_settle_ms",
+    defaults=(GPIO_DEEP_SLEEP_DURATION, BEACON_REPEATS, TX_DBM, ADC_SAMPLES,
+              10.0, 20.0, 750.0, 12.0))
+
+# Prądy [mA] i czasy [ms] – wartości orientacyjne
+I_ACTIVE_MA = 22.0       # CPU aktywny (160 MHz), radio wyłączone
+I_IDLE_MA = 15.0         # CPU w delay()/oczekiwaniu
+I_DS_CONV_MA = 1.5       # DS18B20 podczas konwersji
+I_LED_MA = 2.0           # LED (GPIO8) podczas pomiaru VBAT
+I_SLEEP_MA = 0.012       # deep sleep + prąd własny LDO
+BOOT_MS = 60.0           # ROM bootloader + start aplikacji + wyłączenie Wi-Fi
+ADC_SAMPLE_MS = 0.05     # jedna próbka analogReadMilliVolts()
+BLE_INIT_MS = 45.0       # NimBLEDevice::init + konfiguracja reklamy
+BLE_DEINIT_MS = 8.0
+ADV_OVERHEAD_MS = 2.0    # start()/stop() reklamy
+# Prąd radia w trakcie reklamy BLE vs moc nadawania [dBm → mA]
+TX_CURRENT_MA = {-12: 20.0, -9: 21.0, -6: 22.5, -3: 24.0, 0: 26.0, 3: 29.0, 6: 33.0, 9: 37.0}
+
+Phase = namedtuple("Phase", "name ms mA")
+
+
+def tx_current_mA(tx_dbm):
+    """Prąd radia przy reklamie dla mocy TX [dBm] (skalar lub tablica)."""
+    levels = np.array(sorted(TX_CURRENT_MA), dtype=float)
+    if not np.isin(tx_dbm, levels).all():
+        raise ValueError(f"TX_DBM spoza listy ESP32-C3: {sorted(TX_CURRENT_MA)}")
+    i_tx = np.interp(tx_dbm, levels, [TX_CURRENT_MA[k] for k in sorted(TX_CURRENT_MA)])
+    return float(i_tx) if np.ndim(i_tx) == 0 else i_tx
+
+
+def wake_phases(cfg=FirmwareConfig()):
+    """
+    Lista faz jednego wybudzenia (bez snu): Phase(nazwa, czas [ms], prąd [mA]).
+    Pola cfg mogą być tablicami NumPy – wtedy czasy/prądy faz też są tablicami.
+    """
+    return [
+        Phase("boot", BOOT_MS, I_ACTIVE_MA),
+        Phase("ds_powerup", cfg.ds_powerup_ms, I_IDLE_MA),
+        Phase("ds_conv", cfg.ds_conv_ms, I_IDLE_MA + I_DS_CONV_MA),
+        Phase("adc_settle", cfg.adc_settle_ms, I_IDLE_MA + I_LED_MA),
+        Phase("adc_sample", cfg.adc_samples * ADC_SAMPLE_MS, I_ACTIVE_MA + I_LED_MA),
+        Phase("ble_init", BLE_INIT_MS, I_ACTIVE_MA),
+        Phase("beacon", cfg.repeats * (cfg.beacon_ms + ADV_OVERHEAD_MS), tx_current_mA(cfg.tx_dbm)),
+        Phase("ble_deinit", np.where(np.asarray(cfg.repeats) > 0, BLE_DEINIT_MS, 0.0), I_ACTIVE_MA),
+    ]
+
+
+def cycle_charge(cfg=FirmwareConfig()):
+    """(ładunek wybudzenia [mC], czas aktywny [s], okres cyklu [s], Iavg [mA])."""
+    phases = wake_phases(cfg)
+    q_wake = sum(p.ms * p.mA for p in phases) / 1000.0
+    t_wake = sum(p.ms for p in phases) / 1000.0
+    period = t_wake + cfg.sleep_s
+    i_avg = (q_wake + I_SLEEP_MA * cfg.sleep_s) / period
+    return q_wake, t_wake, period, i_avg
+
+
+def average_current_mA(cfg=FirmwareConfig()):
+    return cycle_charge(cfg)[3]
+
+
+# --- Godzinowe nasłonecznienie ---
+
+# Długość dnia [h] dla ~50°N, Jan..Dec
+DAY_LENGTH_H = [8.3, 9.9, 11.8, 13.8, 15.5, 16.4, 16.0, 14.5, 12.5, 10.5, 8.8, 7.9]
+CHUNK_HOURS = 744        # porcja symulacji (31 dni)
+
+
+def synthetic_hourly(psh_month=BASE_PSH_MONTH, years=1, start_month=1):
+    """Generator porcji godzinowych G [W/m²] (jeden miesiąc na porcję) z profilu PSH."""
+    hours = np.arange(24) + 0.5
+    for y in range(years):
+        for k in range(12):
+            m = (start_month - 1 + k) % 12
+            sunrise = 12.0 - DAY_LENGTH_H[m] / 2.0
+            x = (hours - sunrise) / DAY_LENGTH_H[m]
+            shape = np.where((x > 0) & (x < 1), np.sin(np.pi * np.clip(x, 0, 1)), 0.0)
+            day = shape * (psh_month[m] * 1000.0 / shape.sum())   # suma dnia = PSH × 1000 Wh/m²
+            yield np.tile(day, DAYS_IN_MONTH[m])
+
+
+def file_hourly(hourly, chunk=CHUNK_HOURS):
+    """Generator porcji G [W/m²] z rekordów irradiance.load_hourly (memmap, bez kopiowania całości)."""
+    g = hourly["g"]
+    for i in range(0, g.shape[0], chunk):
+        yield np.clip(np.asarray(g[i:i + chunk], dtype=float), 0.0, None)
+
+
+HourlyChunk = namedtuple("HourlyChunk", "hour0 soc soc_min brownout_h")
+
+
+def hourly_soc(g_chunks, consumption_mWh_h, batt_mWh, p_panel_W, eff, soc0_mWh=None):
+    """
+    Generator symulacji godzinowej: dla każdej porcji G [W/m²] zwraca HourlyChunk
+    (indeks pierwszej godziny, SOC na koniec każdej godziny, min SOC, godziny brown-out).
+    Uzysk godzinowy: p_panel_W [W] × G/1000 × eff × 1 h → p_panel_W × G × eff [mWh].
+    SOC obcięty do [0, batt_mWh]; SOC = 0 oznacza brown-out.
+    """
+    soc = batt_mWh if soc0_mWh is None else soc0_mWh
+    hour0 = 0
+    for g in g_chunks:
+        res = simulate_soc(p_panel_W * g * eff, consumption_mWh_h, batt_mWh,
+                           soc0_mWh=soc, floor=0.0)
+        soc = float(res.soc[-1])
+        yield HourlyChunk(hour0, res.soc, res.soc_min, int((res.soc <= 0.0).sum()))
+        hour0 += g.shape[0]
+
+
+def run_hourly(g_chunks, cfg=FirmwareConfig(), capacity_mAh=500, p_panel_W=0.15, eff_pct=5,
+               v_sys=V_SYS):
+    """Podsumowanie przebiegu godzinowego: słownik z min SOC, godziną minimum i brown-outem."""
+    i_avg = average_current_mA(cfg)
+    batt = battery_mWh(capacity_mAh, v_sys)
+    cons_h = i_avg * v_sys                      # mA × V × 1 h → mWh/h
+    soc_min, min_hour, brownout, hours = batt, -1, 0, 0
+    month_end = []
+    for ch in hourly_soc(g_chunks, cons_h, batt, p_panel_W, eff_pct / 100.0):
+        if ch.soc_min < soc_min:
+            soc_min, min_hour = ch.soc_min, ch.hour0 + int(np.argmin(ch.soc))
+        brownout += ch.brownout_h
+        hours += ch.soc.shape[0]
+        month_end.append(float(ch.soc[-1]))
+    return {"i_avg_mA": i_avg, "consumption_mWh_d": cons_h * 24.0, "batt_mWh": batt,
+            "hours": hours, "soc_min_mWh": soc_min, "min_hour": min_hour,
+            "brownout_h": brownout, "chunk_end_soc_mWh": month_end}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cykl pracy firmware + godzinowa symulacja SOC.")
+    ap.add_argument("--sleep-s", type=float, default=GPIO_DEEP_SLEEP_DURATION)
+    ap.add_argument("--repeats", type=int, default=BEACON_REPEATS)
+    ap.add_argument("--tx-dbm", type=int, default=TX_DBM)
+    ap.add_argument("--adc-samples", type=int, default=ADC_SAMPLES)
+    ap.add_argument("--ds-conv-ms", type=float, default=750.0, help="czas konwersji DS18B20 [ms]")
+    ap.add_argument("--capacity", type=float, default=500, help="pojemność [mAh]")
+    ap.add_argument("--panel", type=float, default=0.15, help="moc panelu [W]")
+    ap.add_argument("--eff", type=float, default=5, help="sprawność całkowita [%%]")
+    ap.add_argument("--years", type=int, default=1, help="lata symulacji (profil syntetyczny)")
+    ap.add_argument("--start-month", type=int, default=7, choices=range(1, 13))
+    ap.add_argument("--irradiance", default=None, help="godzinowy CSV PVGIS/TMY (zamiast profilu PSH)")
+    a = ap.parse_args(argv)
+
+    cfg = FirmwareConfig(a.sleep_s, a.repeats, a.tx_dbm, a.adc_samples, ds_conv_ms=a.ds_conv_ms)
+    q, t_wake, period, i_avg = cycle_charge(cfg)
+    print("=== Cykl pracy firmware (src/main.cpp) ===")
+    for p in wake_phases(cfg):
+        print(f"  {p.name:<11s} {p.ms:8.1f} ms × {p.mA:5.1f} mA = {p.ms * p.mA / 1000.0:7.3f} mC")
+    print(f"  {'sleep':<11s} {cfg.sleep_s * 1000:8.0f} ms × {I_SLEEP_MA:5.3f} mA = {I_SLEEP_MA * cfg.sleep_s:7.3f} mC")
+    print(f"Wybudzenie: {t_wake * 1000:.0f} ms, {q:.3f} mC; okres {period:.2f} s → Iavg {i_avg:.3f} mA")
+
+    t0 = time.perf_counter()
+    if a.irradiance:
+        from irradiance import load_hourly
+        chunks = file_hourly(load_hourly(a.irradiance))
+        label = a.irradiance
+    else:
+        chunks = synthetic_hourly(BASE_PSH_MONTH, a.years, a.start_month)
+        label = f"profil PL, {a.years} lat, start {MONTH_NAMES_PL[a.start_month - 1]}"
+    r = run_hourly(chunks, cfg, a.capacity, a.panel, a.eff)
+    dt = time.perf_counter() - t0
+
+    batt = r["batt_mWh"]
+    print(f"\n[Symulacja godzinowa] {label}: {r['hours']} h w {1000 * dt:.0f} ms")
+    print(f"Zużycie: {r['consumption_mWh_d']:.2f} mWh/d, bateria {batt:.0f} mWh")
+    day = r["min_hour"] // 24 if r["min_hour"] >= 0 else 0
+    print(f"Minimalny SOC: {r['soc_min_mWh']:.0f} mWh ({100.0 * r['soc_min_mWh'] / batt:.1f}%) — dzień {day}")
+    print(f"Brown-out łącznie: {format_time(float(r['brownout_h']))}")
+    print("Wniosek: " + ("stabilne działanie" if r["soc_min_mWh"] > 0 else "grozi rozładowanie"))
+
+
+if __name__ == "__main__":
+    main()
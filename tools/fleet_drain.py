@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Analiza rozładowania floty: rzeczywisty Iavg i pozostały czas pracy z historii VBAT.
+
+- VBAT (read_vbat_mV_calibrated(), co wybudzenie) → SoC [%] wg krzywej OCV (cell_model,
+  domyślnie lut z estimate_battery_percent() w firmware, bez zaokrąglenia).
+- Per czujnik: regresja liniowa SoC(t) w oknie ostatnich --days dni → nachylenie [%/h]
+  → Iavg = −nachylenie/100 · pojemność [mA]; SoC teraz = wartość dopasowania w chwili
+  ostatniego odczytu.
+- Czas do U_safe / U_cutoff jak w consumption-calc-simple.py: pojemność do progu / Iavg,
+  przy czym pojemność do progu wynika z SoC(U) z tabeli OCV, a nie z frakcji liniowej.
+- Statystyki okna trzymane w dziennych koszykach (n, Σt, Σy, Σt², Σty, Σy²) na czujnik →
+  nowa porcja odczytów aktualizuje tylko swoje koszyki, przeliczane są tylko te czujniki.
+- Przyrostowo (--state): znacznik dopisania magazynu (HistoryStore.appended()) zapisany w
+  stanie → następne uruchomienie czyta tylko odczyty dopisane później, także spóźnione
+  (czas sprzed poprzedniego przebiegu). Gdy nieprzeczytane odczyty zdążyły trafić do
+  zamkniętego segmentu (seal) – pełne przeliczenie okna.
+- Ranking pilności: najkrótszy czas do U_safe pierwszy (ładowanie / brak spadku na końcu).
+
+Przykład:
+  python tools/fleet_drain.py hist --capacity 500 --days 14 --top 20 --state drain.npz
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from cell_model import U_CUTOFF, U_SAFE, get_cell
+from history_store import HistoryStore, parse_time
+from runtime_model import format_time
+
+WINDOW_DAYS = 14
+MIN_POINTS = 12
+MIN_SPAN_H = 24.0
+_STATS = ("n", "st", "sy", "stt", "sty", "syy")
+
+
+class DrainModel:
+    """Przyrostowe dopasowanie nachylenia SoC(t) dla floty (indeks = id czujnika)."""
+
+    def __init__(self, window_days=WINDOW_DAYS, n_sensors=0, cell="fw"):
+        self.days = window_days
+        self.cell = get_cell(cell)
+        self.last_ts = np.zeros(0, np.int64)
+        self.tags = np.zeros((0, window_days), np.int64)
+        self.bins = {k: np.zeros((0, window_days)) for k in _STATS}
+        self.dirty = set()
+        self.res = {}
+        self._grow(n_sensors)
+
+    def _grow(self, n):
+        old = self.last_ts.size
+        if n <= old:
+            return
+        n = max(n, 2 * old)
+        self.last_ts = np.concatenate([self.last_ts, np.full(n - old, -1, np.int64)])
+        self.tags = np.vstack([self.tags, np.full((n - old, self.days), -1, np.int64)])
+        for k in _STATS:
+            self.bins[k] = np.vstack([self.bins[k], np.zeros((n - old, self.days))])
+        self.res = {}                                  # nowy rozmiar → pełne przeliczenie
+
+    def update(self, sid, ts, vbat_mV):
+        """Dodaje porcję odczytów (tablice id czujnika, czas epoch [s], VBAT [mV])."""
+        sid = np.asarray(sid, np.int64)
+        ts = np.asarray(ts, np.int64)
+        vbat = np.asarray(vbat_mV, np.float64)
+        ok = vbat > 0                                   # 0 = brak pomiaru
+        sid, ts, vbat = sid[ok], ts[ok], vbat[ok]
+        if sid.size == 0:
+            return
+        self._grow(int(sid.max()) + 1)
+        np.maximum.at(self.last_ts, sid, ts)
+        day = ts // 86400
+        keep = day > self.last_ts[sid] // 86400 - self.days
+        sid, ts, vbat, day = sid[keep], ts[keep], vbat[keep], day[keep]
+        flat = sid * self.days + day % self.days
+
+        # koszyki z innego (starszego) dnia → wyzeruj przed dodaniem
+        tags = self.tags.reshape(-1)
+        stale = np.unique(flat[tags[flat] != day])
+        for k in _STATS:
+            self.bins[k].reshape(-1)[stale] = 0.0
+        tags[flat] = day
+
+        t = (ts - day * 86400) / 3600.0                # godziny od początku dnia koszyka
+        y = self.cell.soc_pct(vbat / 1000.0)
+        size = tags.size
+        for k, w in (("n", None), ("st", t), ("sy", y), ("stt", t * t), ("sty", t * y), ("syy", y * y)):
+            self.bins[k].reshape(-1)[:] += np.bincount(flat, weights=w, minlength=size)
+        self.dirty.update(np.unique(sid).tolist())
+
+    def _fit(self, idx, capacity_mAh):
+        last_day = self.last_ts[idx] // 86400
+        tags = self.tags[idx]
+        valid = (tags > last_day[:, None] - self.days) & (tags >= 0)
+        o = (tags - last_day[:, None]) * 24.0          # przesunięcie koszyka względem ostatniego dnia
+        b = {k: np.where(valid, self.bins[k][idx], 0.0) for k in _STATS}
+        n = b["n"].sum(1)
+        st = (b["st"] + b["n"] * o).sum(1)
+        sy = b["sy"].sum(1)
+        stt = (b["stt"] + 2 * o * b["st"] + b["n"] * o * o).sum(1)
+        sty = (b["sty"] + o * b["sy"]).sum(1)
+        syy = b["syy"].sum(1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stt_c = stt - st * st / n
+            sty_c = sty - st * sy / n
+            syy_c = syy - sy * sy / n
+            slope = sty_c / stt_c                      # %/h
+            soc_now = sy / n + slope * ((self.last_ts[idx] - last_day * 86400) / 3600.0 - st / n)
+            sigma = np.sqrt(np.maximum(syy_c - slope * sty_c, 0.0) / (n - 2))
+            span_h = np.sqrt(12.0 * stt_c / n)         # rozpiętość czasu (jak dla próbek równomiernych)
+            good = (n >= MIN_POINTS) & (span_h >= MIN_SPAN_H)
+            slope = np.where(good, slope, np.nan)
+            i_avg = -slope / 100.0 * capacity_mAh
+            soc_safe, soc_cut = self.cell.soc_pct(U_SAFE), self.cell.soc_pct(U_CUTOFF)
+            drain = i_avg > 0
+            h_safe = np.where(drain, np.maximum(soc_now - soc_safe, 0) / 100.0 * capacity_mAh / i_avg, np.inf)
+            h_cut = np.where(drain, np.maximum(soc_now - soc_cut, 0) / 100.0 * capacity_mAh / i_avg, np.inf)
+        return {
+            "n": n, "soc_now_pct": soc_now, "slope_pct_h": slope, "sigma_pct": sigma,
+            "i_avg_mA": i_avg, "hours_to_safe": np.where(good, h_safe, np.nan),
+            "hours_to_cutoff": np.where(good, h_cut, np.nan), "last_ts": self.last_ts[idx],
+        }
+
+    def estimate(self, capacity_mAh=500.0):
+        """Wyniki dla całej floty; przeliczane tylko czujniki zmienione od ostatniego wywołania."""
+        n = self.last_ts.size
+        if not self.res:
+            idx = np.arange(n)
+        else:
+            idx = np.fromiter(sorted(self.dirty), np.int64, len(self.dirty))
+        cap = np.broadcast_to(np.asarray(capacity_mAh, float), (n,))[idx]
+        fit = self._fit(idx, cap)
+        for k, v in fit.items():
+            if k not in self.res:
+                self.res[k] = np.full(n, np.nan) if v.dtype.kind == "f" else np.zeros(n, v.dtype)
+            self.res[k][idx] = v
+        self.dirty.clear()
+        return self.res
+
+    def rank(self, res=None):
+        """Indeksy czujników wg pilności (czas do U_safe rosnąco, bez danych na końcu)."""
+        res = self.res if res is None else res
+        h = np.where(np.isnan(res["hours_to_safe"]), np.inf, res["hours_to_safe"])
+        seen = res["last_ts"] >= 0
+        return np.flatnonzero(seen)[np.lexsort((np.isnan(res["hours_to_safe"][seen]), h[seen]))]
+
+    # --- stan między uruchomieniami ---
+
+    def save(self, path, marks):
+        """Stan + znacznik dopisania magazynu ({segment: odczytów}) do pliku .npz."""
+        tmp = path + ".tmp.npz"
+        parts = sorted(marks)
+        np.savez(tmp, last_ts=self.last_ts, tags=self.tags,
+                 mark_parts=np.array(parts, dtype="U7"), mark_rows=np.array([marks[p] for p in parts], np.int64),
+                 days=self.days, cell=self.cell.name, **{"b_" + k: v for k, v in self.bins.items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, cell="fw"):
+        """(model, znacznik dopisania); znacznik None → stan nieprzydatny, pełne przeliczenie."""
+        with np.load(path) as z:
+            m = cls(int(z["days"]), cell=cell)
+            if str(z["cell"]) != m.cell.name or "mark_parts" not in z:
+                return m, None                          # inny model ogniwa / stary format stanu
+            m.last_ts, m.tags = z["last_ts"], z["tags"]
+            m.bins = {k: z["b_" + k] for k in _STATS}
+            return m, dict(zip(z["mark_parts"].tolist(), z["mark_rows"].tolist()))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Analiza rozładowania floty z historii VBAT.")
+    ap.add_argument("root", help="katalog history_store.py")
+    ap.add_argument("--capacity", type=float, default=500, help="pojemność ogniwa [mAh]")
+    ap.add_argument("--days", type=int, default=WINDOW_DAYS, help="okno dopasowania [dni]")
+    ap.add_argument("--state", default=None, help="plik stanu (.npz) – przyrostowo tylko nowe odczyty")
+    ap.add_argument("--top", type=int, default=20, help="ile czujników wypisać")
+    ap.add_argument("--cell", default="fw", help="typ ogniwa (cell_model) lub plik CSV z OCV")
+    ap.add_argument("--now", default=None, help="chwila analizy (epoch lub ISO, UTC; domyślnie teraz)")
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    store = HistoryStore(a.root)
+    model, marks = None, None
+    if a.state and os.path.exists(a.state):
+        model, marks = DrainModel.load(a.state, a.cell)
+        if model.days != a.days:
+            marks = None
+    rows = None
+    if marks is not None:
+        # przyrostowo: odczyty dopisane od poprzedniego przebiegu, niezależnie od ich czasu
+        rows, marks, lost = store.scan_appended(marks)
+        if lost:
+            rows = marks = None
+    if rows is None:
+        # pełny przebieg: tylko ostatnie okno
+        model = DrainModel(a.days, cell=a.cell)
+        marks = store.appended()
+        now = int(parse_time(a.now) if a.now else time.time()) + 1
+        rows = store.scan(now - a.days * 86400, now)
+    model.update(rows["sid"], rows["ts"], rows["vbat"])
+    res = model.estimate(a.capacity)
+    if a.state:
+        model.save(a.state, marks)
+    dt = time.perf_counter() - t0
+
+    order = model.rank(res)
+    print(f"=== Rozładowanie floty: {rows['ts'].size} nowych odczytów, {order.size} czujników, "
+          f"{dt:.2f} s ===")
+    print(f"{'#':>3} {'MAC':<17} {'SoC[%]':>6} {'Iavg[mA]':>9} {'σ[%]':>5}  Do {U_SAFE} V")
+    for k, i in enumerate(order[:a.top], 1):
+        h = res["hours_to_safe"][i]
+        when = "brak danych" if np.isnan(h) else ("bez spadku" if np.isinf(h) else format_time(float(h)))
+        print(f"{k:>3} {store.macs[i]:<17} {res['soc_now_pct'][i]:>6.1f} {res['i_avg_mA'][i]:>9.4f} "
+              f"{res['sigma_pct'][i]:>5.2f}  {when}")
+
+
+if __name__ == "__main__":
+    main()
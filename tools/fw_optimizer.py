@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optymalizator budżetu energii firmware: GPIO_DEEP_SLEEP_DURATION, repeats w sendBeacon(),
+TX_DBM i liczba próbek ADC N w read_vbat_mV().
+
+- Energia cyklu i Iavg z modelu duty_cycle.py (wektorowo dla całej siatki).
+- Kryteria (front Pareto): okres raportowania [s] (mniej = lepiej), prawdopodobieństwo
+  dostarczenia pomiaru (≥1 z repeats reklam odebrana), czas pracy na baterii do U_safe
+  (lub minimalny SOC w roku przy zasilaniu PV) oraz szum pomiaru VBAT (~1/√N).
+- Odbiór pojedynczej reklamy: logistycznie względem mocy TX i zapasu łącza lokalizacji
+  (--link-margin, dB przy 0 dBm); model orientacyjny – skalibruj wg statystyk bramki.
+- Ranking tylko wśród konfiguracji spełniających wymagania usługi: domyślnie P(dostarczenia)
+  ≥ MIN_DELIVERY i okres raportowania ≤ MAX_PERIOD_S (inaczej „najlepsza” byłaby najdłuższa
+  drzemka przy najmniejszej mocy – bateria na lata, ale prawie bez odebranych pomiarów);
+  --min-delivery 0 --max-period inf wyłącza ograniczenia.
+
+Przykład:
+  python tools/fw_optimizer.py --capacity 500 --link-margin 3 --min-delivery 0.999 --max-period 300
+  python tools/fw_optimizer.py --panel 0.15 --eff 5 --top 10
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from cell_model import U_FULL, U_SAFE, get_cell
+from duty_cycle import TX_CURRENT_MA, FirmwareConfig, cycle_charge
+from soc_sim import simulate_soc
+from runtime_model import format_time
+from solar_model import DAYS_IN_MONTH, battery_mWh, consumption_mWh_day
+from solar_sweep import psh_daily_by_start
+
+# Domyślna przestrzeń konfiguracji
+SLEEP_GRID_S = np.unique(np.round(np.geomspace(5, 3600, 120))).astype(int)
+REPEATS_GRID = np.arange(1, 7)
+TX_GRID = np.array(sorted(TX_CURRENT_MA))
+ADC_N_GRID = np.array([1, 2, 4, 8, 16, 32, 64, 128])
+
+MIN_DELIVERY = 0.99      # domyślne wymagania usługi: P(≥1 reklama odebrana) na cykl
+MAX_PERIOD_S = 600.0     # … i najdłuższy okres raportowania [s]
+
+ADC_NOISE_MV = 20.0      # szum pojedynczej próbki VBAT [mV] (po skali dzielnika)
+RX_SLOPE_DB = 3.0        # nachylenie krzywej odbioru [dB]
+
+
+def config_grid(sleep_s=SLEEP_GRID_S, repeats=REPEATS_GRID, tx_dbm=TX_GRID, adc_n=ADC_N_GRID):
+    """Iloczyn kartezjański siatek → FirmwareConfig z polami-tablicami (płaskimi)."""
+    g = np.meshgrid(sleep_s, repeats, tx_dbm, adc_n, indexing="ij")
+    s, r, t, n = (a.ravel() for a in g)
+    return FirmwareConfig(sleep_s=s.astype(float), repeats=r, tx_dbm=t, adc_samples=n)
+
+
+def delivery_probability(repeats, tx_dbm, link_margin_dB=3.0):
+    """P(co najmniej jedna z repeats reklam odebrana)."""
+    p1 = 1.0 / (1.0 + np.exp(-(np.asarray(tx_dbm, float) + link_margin_dB) / RX_SLOPE_DB))
+    return 1.0 - (1.0 - p1) ** repeats
+
+
+def evaluate(cfg, capacity_mAh=500.0, link_margin_dB=3.0, p_panel_W=0.0, eff_pct=5.0,
+             start_month=7, cell="fw"):
+    """Kolumny wyników dla siatki cfg (słownik tablic)."""
+    _, _, period, i_avg = cycle_charge(cfg)
+    fraction_safe = get_cell(cell).charge_fraction(U_FULL, U_SAFE)
+    out = {
+        "sleep_s": cfg.sleep_s, "repeats": cfg.repeats, "tx_dbm": cfg.tx_dbm,
+        "adc_n": cfg.adc_samples, "period_s": period, "i_avg_mA": i_avg,
+        "delivery": delivery_probability(cfg.repeats, cfg.tx_dbm, link_margin_dB),
+        "vbat_noise_mV": ADC_NOISE_MV / np.sqrt(cfg.adc_samples),
+        "life_h": capacity_mAh * fraction_safe / i_avg,
+    }
+    if p_panel_W > 0:
+        # roczny symulator SOC (jak solar_runtime_calc_v4) dla unikalnych wartości Iavg
+        uniq, inv = np.unique(i_avg, return_inverse=True)
+        harvest = p_panel_W * 1000.0 * psh_daily_by_start()[start_month - 1] * (eff_pct / 100.0)
+        res = simulate_soc(np.broadcast_to(harvest, (uniq.size, harvest.size)),
+                           consumption_mWh_day(uniq)[:, None], battery_mWh(capacity_mAh),
+                           days_month=DAYS_IN_MONTH, trajectory=False)
+        out["soc_min_pct"] = (100.0 * res.soc_min / battery_mWh(capacity_mAh))[inv]
+    return out
+
+
+def _dominated_by(cand, pts):
+    # maska: pts[i] zdominowany (lub równy) przez któryś z cand; porównania kolumnami,
+    # bez tablicy n × m × k
+    if cand.shape[0] == 0:
+        return np.zeros((pts.shape[0], 0), dtype=bool)
+    le = cand[None, :, 0] <= pts[:, None, 0]
+    for j in range(1, pts.shape[1]):
+        le &= cand[None, :, j] <= pts[:, None, j]
+    return le
+
+
+def pareto_mask(obj, block=1024):
+    """
+    Maska punktów niezdominowanych (wszystkie kryteria minimalizowane), obj: n × k.
+    Punkt może być zdominowany tylko przez punkt wcześniejszy w porządku leksykograficznym,
+    więc front budowany jest blokami w tym porządku (z duplikatów zostaje pierwszy).
+    """
+    n = obj.shape[0]
+    order = np.lexsort(obj.T[::-1])
+    srt = np.ascontiguousarray(obj[order])
+    front = np.empty((0, obj.shape[1]))
+    keep = np.zeros(n, dtype=bool)
+    for b0 in range(0, n, block):
+        blk = srt[b0:b0 + block]
+        dom = _dominated_by(front, blk).any(1)
+        # wcześniejsze punkty tego samego bloku (j < i)
+        dom |= np.tril(_dominated_by(blk, blk), -1).any(1)
+        keep[order[b0:b0 + blk.shape[0]][~dom]] = True
+        front = np.vstack([front, blk[~dom]])
+    return keep
+
+
+def optimize(capacity_mAh=500.0, link_margin_dB=3.0, min_delivery=MIN_DELIVERY, max_period_s=MAX_PERIOD_S,
+             max_noise_mV=np.inf, p_panel_W=0.0, eff_pct=5.0, start_month=7, cfg=None, cell="fw"):
+    """
+    Zwraca (kolumny wyników, indeksy frontu Pareto posortowane wg czasu pracy/SOC);
+    front i ranking tylko wśród konfiguracji spełniających min_delivery/max_period_s/max_noise_mV.
+    """
+    cfg = config_grid() if cfg is None else cfg
+    res = evaluate(cfg, capacity_mAh, link_margin_dB, p_panel_W, eff_pct, start_month, cell)
+    ok = (res["delivery"] >= min_delivery) & (res["period_s"] <= max_period_s) & \
+         (res["vbat_noise_mV"] <= max_noise_mV)
+    energy = -res["soc_min_pct"] if p_panel_W > 0 else -res["life_h"]
+    obj = np.column_stack([res["period_s"], -res["delivery"], energy, res["vbat_noise_mV"]])
+    idx = np.flatnonzero(ok)
+    front = idx[pareto_mask(obj[idx])]
+    # ranking: najpierw zapas energii, potem krótszy okres raportowania
+    front = front[np.lexsort((res["period_s"][front], energy[front]))]
+    return res, front
+
+
+def defines(res, i):
+    """Wartości do wklejenia w src/main.cpp dla konfiguracji i."""
+    return (f"#define GPIO_DEEP_SLEEP_DURATION {int(res['sleep_s'][i])}\n"
+            f"#define TX_DBM {int(res['tx_dbm'][i])}\n"
+            f"sendBeacon(advertisementData, size, {int(res['repeats'][i])});\n"
+            f"const int N = {int(res['adc_n'][i])};  // read_vbat_mV()")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Optymalizator budżetu energii firmware (front Pareto).")
+    ap.add_argument("--capacity", type=float, default=500, help="pojemność [mAh]")
+    ap.add_argument("--link-margin", type=float, default=3.0, help="zapas łącza przy 0 dBm [dB]")
+    ap.add_argument("--min-delivery", type=float, default=MIN_DELIVERY, help="min. P(dostarczenia) [0-1]")
+    ap.add_argument("--max-period", type=float, default=MAX_PERIOD_S, help="maks. okres raportowania [s]")
+    ap.add_argument("--max-noise", type=float, default=np.inf, help="maks. szum VBAT [mV]")
+    ap.add_argument("--panel", type=float, default=0.0, help="moc panelu [W] (0 = tylko bateria)")
+    ap.add_argument("--eff", type=float, default=5, help="sprawność PV [%%]")
+    ap.add_argument("--start-month", type=int, default=7, choices=range(1, 13))
+    ap.add_argument("--top", type=int, default=15, help="ile pozycji frontu wypisać")
+    ap.add_argument("--cell", default="fw", help="typ ogniwa (cell_model) lub plik CSV z OCV")
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    res, front = optimize(a.capacity, a.link_margin, a.min_delivery, a.max_period, a.max_noise,
+                          a.panel, a.eff, a.start_month, cell=a.cell)
+    dt = time.perf_counter() - t0
+    n = res["period_s"].size
+    print(f"=== Optymalizacja firmware: {n} konfiguracji w {1000 * dt:.0f} ms, front Pareto: {front.size} ===")
+    print(f"Wymagania: P(dostarczenia) ≥ {a.min_delivery:g}, okres ≤ {a.max_period:g} s"
+          f"{f', szum ≤ {a.max_noise:g} mV' if np.isfinite(a.max_noise) else ''}")
+    if front.size == 0:
+        print("Brak konfiguracji spełniających ograniczenia.")
+        return
+    energy_hdr = "SOCmin[%]" if a.panel > 0 else "Czas pracy do U_safe"
+    print(f"{'#':>3} {'sleep[s]':>8} {'rep':>3} {'TX':>4} {'N':>4} {'Iavg[mA]':>9} "
+          f"{'P(dost.)':>8} {'szum[mV]':>8}  {energy_hdr}")
+    for k, i in enumerate(front[:a.top], 1):
+        energy = f"{res['soc_min_pct'][i]:.1f}" if a.panel > 0 else format_time(float(res["life_h"][i]))
+        print(f"{k:>3} {res['sleep_s'][i]:>8.0f} {res['repeats'][i]:>3d} {res['tx_dbm'][i]:>4d} "
+              f"{res['adc_n'][i]:>4d} {res['i_avg_mA'][i]:>9.4f} {res['delivery'][i]:>8.4f} "
+              f"{res['vbat_noise_mV'][i]:>8.2f}  {energy}")
+    print("\nNajlepsza konfiguracja (src/main.cpp):")
+    print(defines(res, front[0]))
+
+
+if __name__ == "__main__":
+    main()
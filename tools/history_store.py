@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kolumnowy magazyn historii odczytów czujników (append-only, zapytania przez memmap).
+
+Układ katalogu:
+  ROOT/sensors.txt              rejestr MAC → id (numer wiersza, uint16), tylko dopisywanie
+  ROOT/2026-10/*.raw            segment miesięczny: kolumny dopisywane w kolejności napływu
+                                (sid u2, ts u4, temp i2, vbat u2, battery u1, count u4) – 14 B/odczyt
+  ROOT/2026-09/sealed/          segment zamknięty (seal): posortowany wg (czujnik, czas), bez
+                                kolumny sid – 9 B/odczyt: temp/vbat/battery.col jak w .raw,
+                                ts/count.d16 przyrost u2 do poprzedniego odczytu + *.rows.npy,
+                                *.vals.npy (wartości bezwzględne: co SPARSE_EVERY-ty wiersz,
+                                początek czujnika, przerwa > 18 h, reset bootcount);
+                                offsets.npy (początek danych każdego czujnika), sparse.npy (co
+                                SPARSE_EVERY-ty znacznik czasu), merged.npy (ile odczytów .raw
+                                scalono łącznie – znacznik pokolenia)
+  ROOT/2026-09/raw_base.npy     numer dopisania pierwszego wiersza plików .raw
+  ROOT/.lock                    blokada (flock): wyłączna dla zapisu, dzielona dla odczytu
+
+- Jednostki jak w reklamie BTHome: setne °C (int16, brak = -32768), mV (uint16, brak = 0),
+  % (uint8, brak = 255), bootcount (uint32), czas: sekundy epoch UTC (uint32).
+- Zapytanie o jeden czujnik i miesiąc w segmencie zamkniętym czyta offsets.npy, fragment
+  sparse.npy i tylko wycinek kolumn tego czujnika (memmap); nowe dane (.raw) skanowane
+  wg kolumny sid – dlatego segmenty zamyka się po końcu miesiąca (seal).
+- Rozmiar: firmware raportuje co wybudzenie (GPIO_DEEP_SLEEP_DURATION 5 s + praca ≈ 5.9 s,
+  duty_cycle.py) → ≈ 5.3 mln odczytów/rok na czujnik ≈ 48 MB/rok zamkniętych segmentów;
+  flota 5000 czujników ≈ 27 mld odczytów ≈ 240 GB/rok (+ bieżący miesiąc w .raw ≈ 31 GB).
+  „Kilkaset MB/rok” dla całej floty mieści się tylko przy rzadszym zapisie, np. jeden odczyt
+  na godzinę z czujnika ≈ 44 mln odczytów ≈ 0.4 GB/rok.
+- Późne dane do zamkniętego segmentu trafiają do .raw i są scalane przy kolejnym seal.
+- Zapis (append, seal, naprawa po przerwaniu – _recover) tylko pod wyłączną blokadą; odczyt
+  (query, scan, info, fleet_drain) niczego nie zmienia na dysku, kolumny .raw przycina tylko
+  w pamięci do najkrótszej.
+- Seal odporny na przerwanie: nowe kolumny powstają w .seal/, zamiana sealed/ → .old/,
+  .seal/ → sealed/ (punkt zatwierdzenia). Seal usuwa tylko scalone wiersze .raw: wiersze
+  o numerze dopisania < merged odczyt pomija, a pliki .raw kasowane są, gdy w całości
+  scalone (raw_base = merged). Przerwany seal kończy albo wycofuje następny zapis.
+- Odczyty bez poprawnego czasu (brak, NaN, poza uint32) są odrzucane przy dopisywaniu.
+- Znacznik dopisania (appended()): per segment liczba odczytów kiedykolwiek dopisanych
+  (scalone + bieżące .raw); scan_appended(znaczniki) zwraca tylko odczyty dopisane później,
+  niezależnie od ich czasu (późne dane też) – przetwarzanie przyrostowe (fleet_drain.py).
+
+Przykład:
+  python tools/ingest.py gw.log --emit | python tools/history_store.py append hist -
+  python tools/history_store.py seal hist
+  python tools/history_store.py query hist AA:BB:CC:00:00:07 --from 2026-09-01 --to 2026-10-01
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:                          # Windows: bez blokady między procesami
+    fcntl = None
+
+COLUMNS = (("ts", "<u4"), ("temp", "<i2"), ("vbat", "<u2"), ("battery", "u1"), ("count", "<u4"))
+RAW_COLUMNS = (("sid", "<u2"),) + COLUMNS
+DELTA_COLUMNS = ("ts", "count")            # w segmencie zamkniętym: przyrost u2 + wyjątki
+SPARSE_EVERY = 256
+TEMP_NONE, VBAT_NONE, BATT_NONE = -32768, 0, 255
+APPEND_LINES = 1 << 16
+LOCK_FILE = ".lock"
+
+
+def _col(path, dtype, n=None):
+    """Kolumna jako memmap (pusta tablica dla pustego/brakującego pliku)."""
+    dtype = np.dtype(dtype)
+    size = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    n = size if n is None else min(n, size)
+    if n == 0:
+        return np.empty(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+def _write_int(path, value):
+    # mały plik .npy podmieniany atomowo (plik tymczasowy + os.replace)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        np.save(fh, np.int64(value))
+    os.replace(tmp, path)
+
+
+def partition_of(ts):
+    """Miesiąc (datetime64[M]) dla czasów epoch [s]; str() daje nazwę segmentu 'RRRR-MM'."""
+    return np.asarray(ts, dtype=np.int64).astype("M8[s]").astype("M8[M]")
+
+
+def encode_columns(ts, temperature_c=None, vbat_mV=None, battery_pct=None, count=None):
+    """Wartości fizyczne → kolumny o stałej szerokości (z wartościami 'brak')."""
+    ts = np.atleast_1d(np.asarray(ts, dtype=np.float64))
+    n = ts.size
+
+    def conv(x, scale, lo, hi, none, dtype):
+        if x is None:
+            return np.full(n, none, dtype)
+        x = np.broadcast_to(np.asarray(x, dtype=np.float64), (n,))
+        out = np.clip(np.rint(x * scale), lo, hi)
+        return np.where(np.isnan(out), none, out).astype(dtype)
+
+    return {
+        "ts": np.rint(ts).astype(np.uint32),
+        "temp": conv(temperature_c, 100.0, -32767, 32767, TEMP_NONE, np.int16),
+        "vbat": conv(vbat_mV, 1.0, 1, 65535, VBAT_NONE, np.uint16),
+        "battery": conv(battery_pct, 1.0, 0, 254, BATT_NONE, np.uint8),
+        "count": conv(count, 1.0, 0, 2**32 - 1, 0, np.uint32),
+    }
+
+
+def _delta_encode(x, sid):
+    """Kolumna posortowana wg (czujnik, czas) → (przyrosty u2, wiersze i wartości wyjątków)."""
+    x = np.asarray(x, dtype=np.int64)
+    d = np.diff(x, prepend=0)
+    # wartość bezwzględna: co SPARSE_EVERY-ty wiersz, początek czujnika, przyrost poza u2
+    exc = (d < 0) | (d > 0xFFFF) | (np.arange(x.size) % SPARSE_EVERY == 0)
+    exc[1:] |= sid[1:] != sid[:-1]
+    rows = np.flatnonzero(exc)
+    return np.where(exc, 0, d).astype("<u2"), rows.astype(np.int64), x[rows]
+
+
+class _DeltaColumn:
+    """Kolumna przyrostowa segmentu zamkniętego; wycinek [i0:i1] dekodowany od wyjątku ≤ i0."""
+
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.d = _col(path + ".d16", "<u2")
+        self.size = self.d.size
+        if self.size:
+            self.rows = np.load(path + ".rows.npy", mmap_mode="r")
+            self.vals = np.load(path + ".vals.npy", mmap_mode="r")
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        i0, i1, _ = key.indices(self.size)
+        if i1 <= i0:
+            return np.empty(0, self.dtype)
+        k0 = int(np.searchsorted(self.rows, i0, "right")) - 1
+        k1 = int(np.searchsorted(self.rows, i1, "left"))
+        a = int(self.rows[k0])
+        x = np.asarray(self.d[a:i1], dtype=np.int64)
+        p = np.asarray(self.rows[k0:k1]) - a
+        x[p] = 0
+        c = np.cumsum(x)
+        c += np.repeat(np.asarray(self.vals[k0:k1]) - c[p], np.diff(np.append(p, x.size)))
+        return c[i0 - a:].astype(self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        x = self[0:self.size]
+        return x if dtype is None else x.astype(dtype)
+
+
+def _bound(ts, sparse, a, b, t, side):
+    """Indeks w [a, b) pierwszego ts >= t ('left') / > t ('right'); ts posortowane w [a, b)."""
+    k0, k1 = -(-a // SPARSE_EVERY), -(-b // SPARSE_EVERY)
+    j = int(np.searchsorted(sparse[k0:k1], t, side))
+    lo = a if j == 0 else (k0 + j - 1) * SPARSE_EVERY
+    hi = b if k0 + j >= k1 else (k0 + j) * SPARSE_EVERY
+    return lo + int(np.searchsorted(ts[lo:hi], t, side))
+
+
+class HistoryStore:
+    """Magazyn historii w katalogu root."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._reg_path = os.path.join(root, "sensors.txt")
+        self.macs = []
+        self.ids = {}
+        self._load_registry()
+        self.rejected = 0                    # odczyty odrzucone przy dopisywaniu (zły czas)
+        self._lock_depth = 0
+
+    # --- blokada ---
+
+    @contextmanager
+    def _lock(self, exclusive):
+        """flock na ROOT/.lock: wyłączna dla zapisu (append, seal, naprawa), dzielona dla odczytu."""
+        if self._lock_depth or fcntl is None:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+        try:
+            fh = open(os.path.join(self.root, LOCK_FILE), "a")
+        except OSError:                      # magazyn tylko do odczytu – bez blokady
+            fh = None
+        try:
+            if fh is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            yield
+        finally:
+            self._lock_depth -= 1
+            if fh is not None:
+                fh.close()                   # zamknięcie zwalnia blokadę
+
+    # --- zapis ---
+
+    def _load_registry(self):
+        # dopisane przez inne procesy od ostatniego odczytu (rejestr tylko rośnie);
+        # tylko pełne wiersze – ostatni może być w trakcie zapisu
+        if os.path.exists(self._reg_path):
+            with open(self._reg_path, encoding="ascii") as fh:
+                macs = [ln.strip() for ln in fh.read().split("\n")[:-1] if ln.strip()]
+            for m in macs[len(self.macs):]:
+                self.ids[m] = len(self.macs)
+                self.macs.append(m)
+
+    def sensor_ids(self, macs):
+        """MAC → id (nowe czujniki dopisywane do rejestru)."""
+        macs = np.atleast_1d(np.asarray(macs))
+        uniq, inv = np.unique(macs, return_inverse=True)
+        with self._lock(exclusive=True):
+            self._load_registry()
+            new = [str(m).upper() for m in uniq if str(m).upper() not in self.ids]
+            if new:
+                if len(self.macs) + len(new) > 65535:
+                    raise ValueError("Rejestr czujników pełny (uint16).")
+                with open(self._reg_path, "a", encoding="ascii") as fh:
+                    fh.write("".join(m + "\n" for m in new))
+                for m in new:
+                    self.ids[m] = len(self.macs)
+                    self.macs.append(m)
+        return np.array([self.ids[str(m).upper()] for m in uniq], dtype=np.uint16)[inv]
+
+    def append(self, ts, sensor, temperature_c=None, vbat_mV=None, battery_pct=None, count=None):
+        """Dopisuje odczyty (skalary lub tablice); sensor: MAC lub tablica MAC. Zwraca liczbę zapisanych."""
+        ts = np.atleast_1d(np.asarray(ts, dtype=np.float64))
+        ok = np.isfinite(ts) & (ts >= 0) & (ts <= 2**32 - 1)
+        cols = encode_columns(np.where(ok, ts, 0), temperature_c, vbat_mV, battery_pct, count)
+        with self._lock(exclusive=True):
+            cols["sid"] = np.broadcast_to(self.sensor_ids(sensor), ts.shape)
+            if not ok.all():
+                self.rejected += int(ts.size - ok.sum())
+                cols = {k: v[ok] for k, v in cols.items()}
+            n = cols["ts"].size
+            if n == 0:
+                return 0
+            part = partition_of(cols["ts"])
+            order = np.argsort(part, kind="stable")
+            months, starts = np.unique(part[order], return_index=True)
+            bounds = list(starts) + [n]
+            for m, i0, i1 in zip(months, bounds[:-1], bounds[1:]):
+                sel = order[i0:i1]
+                pdir = os.path.join(self.root, str(m))
+                os.makedirs(pdir, exist_ok=True)
+                self._recover(pdir)
+                for name, dtype in RAW_COLUMNS:
+                    with open(os.path.join(pdir, name + ".raw"), "ab") as fh:
+                        fh.write(np.ascontiguousarray(cols[name][sel], dtype=dtype).tobytes())
+        return n
+
+    # --- segmenty ---
+
+    def partitions(self):
+        return sorted(d for d in os.listdir(self.root)
+                      if len(d) == 7 and d[4] == "-" and os.path.isdir(os.path.join(self.root, d)))
+
+    def _sealed_dir(self, pdir):
+        # sealed/; w oknie zamiany (lub po przerwaniu między zamianami) poprzedni .old/
+        for d in ("sealed", ".old"):
+            path = os.path.join(pdir, d)
+            if os.path.exists(os.path.join(path, "offsets.npy")):
+                return path
+        return None
+
+    def _merged(self, pdir, sdir=None):
+        """Liczba odczytów .raw scalonych dotąd w segment zamknięty (stare bez merged.npy: wszystkie)."""
+        sdir = self._sealed_dir(pdir) if sdir is None else sdir
+        if sdir is None:
+            return 0
+        path = os.path.join(sdir, "merged.npy")
+        if os.path.exists(path):
+            return int(np.load(path))
+        return int(np.load(os.path.join(sdir, "offsets.npy"))[-1])
+
+    def _raw_base(self, pdir, merged):
+        # numer (w kolejności dopisania) pierwszego wiersza plików .raw; brak pliku = merged
+        path = os.path.join(pdir, "raw_base.npy")
+        return int(np.load(path)) if os.path.exists(path) else merged
+
+    def _raw_len(self, pdir):
+        # długość wg najkrótszej kolumny (przerwany zapis nie psuje odczytu)
+        return min((os.path.getsize(p) // np.dtype(dt).itemsize if os.path.exists(p) else 0)
+                   for p, dt in ((os.path.join(pdir, name + ".raw"), dt) for name, dt in RAW_COLUMNS))
+
+    def _raw_seq(self, pdir):
+        """Widoczne odczyty .raw (bez scalonych już w sealed/) i numer dopisania pierwszego z nich."""
+        merged = self._merged(pdir)
+        base = self._raw_base(pdir, merged)
+        n = self._raw_len(pdir)
+        skip = min(max(merged - base, 0), n)
+        return {name: _col(os.path.join(pdir, name + ".raw"), dt, n)[skip:] for name, dt in RAW_COLUMNS}, base + skip
+
+    def _raw(self, pdir):
+        return self._raw_seq(pdir)[0]
+
+    def _sealed(self, pdir):
+        sdir = self._sealed_dir(pdir)
+        if sdir is None:
+            return None
+        cols = {}
+        for name, dt in COLUMNS:
+            path = os.path.join(sdir, name)
+            if name in DELTA_COLUMNS and not os.path.exists(path + ".col"):   # .col: sprzed DELTA_COLUMNS
+                cols[name] = _DeltaColumn(path, dt)
+            else:
+                cols[name] = _col(path + ".col", dt)
+        cols["offsets"] = np.load(os.path.join(sdir, "offsets.npy"), mmap_mode="r")
+        cols["sparse"] = np.load(os.path.join(sdir, "sparse.npy"), mmap_mode="r")
+        return cols
+
+    def _drop_merged(self, pdir):
+        # .raw w całości scalone → usuń pliki i przesuń raw_base (inaczej scalone zostają ukryte)
+        merged = self._merged(pdir)
+        base = self._raw_base(pdir, merged)
+        if merged <= base or self._raw_len(pdir) > merged - base:
+            return
+        for name, _ in RAW_COLUMNS:
+            p = os.path.join(pdir, name + ".raw")
+            if os.path.exists(p):
+                os.remove(p)
+        _write_int(os.path.join(pdir, "raw_base.npy"), merged)
+
+    def _recover(self, pdir):
+        """Kończy lub wycofuje przerwany seal, wyrównuje kolumny .raw (tylko pod blokadą zapisu)."""
+        sdir, old = os.path.join(pdir, "sealed"), os.path.join(pdir, ".old")
+        shutil.rmtree(os.path.join(pdir, ".seal"), ignore_errors=True)
+        if not os.path.exists(os.path.join(sdir, "offsets.npy")) and \
+                os.path.exists(os.path.join(old, "offsets.npy")):
+            shutil.rmtree(sdir, ignore_errors=True)
+            os.replace(old, sdir)            # przerwane między zamianami – przywróć poprzedni stan
+        shutil.rmtree(old, ignore_errors=True)
+        n = self._raw_len(pdir)
+        for name, dt in RAW_COLUMNS:         # przerwane dopisywanie: kolumny do wspólnej długości
+            p = os.path.join(pdir, name + ".raw")
+            if os.path.exists(p) and os.path.getsize(p) > n * np.dtype(dt).itemsize:
+                os.truncate(p, n * np.dtype(dt).itemsize)
+        self._drop_merged(pdir)
+
+    def seal(self, part):
+        """Scala segment (zamknięte dane + .raw) w posortowane kolumny z indeksami."""
+        pdir = os.path.join(self.root, part)
+        with self._lock(exclusive=True):
+            self._recover(pdir)
+            self._load_registry()
+            raw = self._raw(pdir)
+            sealed = self._sealed(pdir)
+            merged = self._merged(pdir)
+            if not os.path.exists(os.path.join(pdir, "raw_base.npy")):
+                _write_int(os.path.join(pdir, "raw_base.npy"), self._raw_base(pdir, merged))
+            merged += raw["ts"].size
+            parts = [{k: np.asarray(v) for k, v in raw.items()}]
+            if sealed is not None:
+                off = np.asarray(sealed["offsets"])
+                old = {name: np.asarray(sealed[name]) for name, _ in COLUMNS}
+                old["sid"] = np.repeat(np.arange(off.size - 1, dtype=np.uint16), np.diff(off))
+                parts.append(old)
+            cols = {name: np.concatenate([p[name] for p in parts]) for name, _ in RAW_COLUMNS}
+            order = np.lexsort((cols["ts"], cols["sid"]))
+            offsets = np.searchsorted(cols["sid"][order], np.arange(len(self.macs) + 1)).astype(np.int64)
+
+            tmp = os.path.join(pdir, ".seal")
+            os.makedirs(tmp)
+            sid = cols["sid"][order]
+            for name, dtype in COLUMNS:
+                path = os.path.join(tmp, name)
+                if name in DELTA_COLUMNS:
+                    d, rows, vals = _delta_encode(cols[name][order], sid)
+                    d.tofile(path + ".d16")
+                    np.save(path + ".rows.npy", rows)
+                    np.save(path + ".vals.npy", vals)
+                else:
+                    cols[name][order].astype(dtype).tofile(path + ".col")
+            np.save(os.path.join(tmp, "offsets.npy"), offsets)
+            np.save(os.path.join(tmp, "sparse.npy"), cols["ts"][order][::SPARSE_EVERY])
+            np.save(os.path.join(tmp, "merged.npy"), np.int64(merged))
+            del raw, sealed, parts
+            sdir, old = os.path.join(pdir, "sealed"), os.path.join(pdir, ".old")
+            if os.path.isdir(sdir):
+                os.replace(sdir, old)
+            os.replace(tmp, sdir)            # punkt zatwierdzenia: scalone wiersze .raw odtąd ukryte
+            shutil.rmtree(old, ignore_errors=True)
+            self._drop_merged(pdir)
+        return order.size
+
+    def seal_closed(self, now=None, all_=False):
+        """Zamyka segmenty sprzed bieżącego miesiąca (lub wszystkie) z nowymi danymi."""
+        current = str(partition_of([now if now is not None else time.time()])[0])
+        done = {}
+        with self._lock(exclusive=True):
+            for part in self.partitions():
+                if (all_ or part < current) and self._raw(os.path.join(self.root, part))["ts"].size:
+                    done[part] = self.seal(part)
+        return done
+
+    # --- zapytania (blokada dzielona, bez zmian na dysku) ---
+
+    def _parts_in(self, t_from, t_to):
+        parts = self.partitions()
+        if t_from is not None:
+            p0 = str(partition_of([t_from])[0])
+            parts = [p for p in parts if p >= p0]
+        if t_to is not None:
+            p1 = str(partition_of([t_to])[0])
+            parts = [p for p in parts if p <= p1]
+        return parts
+
+    def query(self, mac, t_from=None, t_to=None):
+        """Odczyty jednego czujnika w [t_from, t_to) – słownik kolumn posortowanych wg czasu."""
+        lo_t = 0 if t_from is None else int(np.ceil(t_from))
+        hi_t = 2**32 if t_to is None else int(np.ceil(t_to))
+        out = {name: [] for name, _ in COLUMNS}
+        needs_sort = False
+        with self._lock(exclusive=False):
+            self._load_registry()
+            sid = self.ids.get(mac.upper())
+            if sid is None:
+                return {name: np.empty(0, dt) for name, dt in COLUMNS}
+            for part in self._parts_in(t_from, t_to):
+                pdir = os.path.join(self.root, part)
+                sealed = self._sealed(pdir)
+                if sealed is not None and sid + 1 < sealed["offsets"].size:
+                    a, b = int(sealed["offsets"][sid]), int(sealed["offsets"][sid + 1])
+                    if b > a:
+                        i0 = _bound(sealed["ts"], sealed["sparse"], a, b, lo_t, "left")
+                        i1 = _bound(sealed["ts"], sealed["sparse"], a, b, hi_t, "left")
+                        for name, _ in COLUMNS:
+                            out[name].append(np.array(sealed[name][i0:i1]))
+                raw = self._raw(pdir)
+                if raw["ts"].size:
+                    m = (raw["sid"] == sid) & (raw["ts"] >= lo_t) & (raw["ts"] < hi_t)
+                    if m.any():
+                        needs_sort = True
+                        for name, _ in COLUMNS:
+                            out[name].append(raw[name][m])
+        res = {name: (np.concatenate(v) if v else np.empty(0, dt))
+               for (name, dt), v in zip(COLUMNS, out.values())}
+        if needs_sort:
+            order = np.argsort(res["ts"], kind="stable")
+            res = {k: v[order] for k, v in res.items()}
+        return res
+
+    def scan(self, t_from=None, t_to=None):
+        """Wszystkie odczyty floty w [t_from, t_to): kolumny + 'sid' (kolejność: segment, czujnik)."""
+        lo_t = 0 if t_from is None else int(np.ceil(t_from))
+        hi_t = 2**32 if t_to is None else int(np.ceil(t_to))
+        out = []
+        with self._lock(exclusive=False):
+            for part in self._parts_in(t_from, t_to):
+                pdir = os.path.join(self.root, part)
+                sealed = self._sealed(pdir)
+                if sealed is not None:
+                    off = np.asarray(sealed["offsets"])
+                    sid = np.repeat(np.arange(off.size - 1, dtype=np.uint16), np.diff(off))
+                    out.append(dict({name: np.asarray(sealed[name]) for name, _ in COLUMNS}, sid=sid))
+                raw = self._raw(pdir)
+                if raw["ts"].size:
+                    out.append({k: np.asarray(v) for k, v in raw.items()})
+        res = {}
+        for name, dt in RAW_COLUMNS:
+            res[name] = np.concatenate([o[name] for o in out]) if out else np.empty(0, dt)
+        m = (res["ts"] >= lo_t) & (res["ts"] < hi_t)
+        return {k: v[m] for k, v in res.items()}
+
+    def appended(self):
+        """Znacznik dopisania: {segment: liczba odczytów dopisanych od początku}."""
+        marks = {}
+        with self._lock(exclusive=False):
+            for part in self.partitions():
+                raw, first = self._raw_seq(os.path.join(self.root, part))
+                marks[part] = first + raw["ts"].size
+        return marks
+
+    def scan_appended(self, marks):
+        """
+        Odczyty dopisane po znaczniku marks (z appended()) – kolumny + 'sid' w kolejności
+        dopisania. Zwraca (odczyty, nowy znacznik, utracone); utracone = segmenty, w których
+        część nieprzeczytanych odczytów scalono już (seal) – tych nie da się wskazać, trzeba
+        przeliczyć od nowa.
+        """
+        out, new, lost = [], {}, []
+        with self._lock(exclusive=False):
+            for part in self.partitions():
+                raw, first = self._raw_seq(os.path.join(self.root, part))
+                new[part] = first + raw["ts"].size
+                seen = marks.get(part, 0)
+                if seen < first or seen > new[part]:
+                    lost.append(part)
+                elif seen < new[part]:
+                    out.append({k: np.asarray(v[seen - first:]) for k, v in raw.items()})
+        res = {name: np.concatenate([o[name] for o in out]) if out else np.empty(0, dt)
+               for name, dt in RAW_COLUMNS}
+        return res, new, lost
+
+    def info(self):
+        """Segmenty: odczyty zamknięte/.raw i rozmiar na dysku."""
+        rows = []
+        with self._lock(exclusive=False):
+            for part in self.partitions():
+                pdir = os.path.join(self.root, part)
+                sealed = self._sealed(pdir)
+                size = sum(os.path.getsize(os.path.join(d, f))
+                           for d, _, files in os.walk(pdir) for f in files)
+                rows.append((part, 0 if sealed is None else sealed["ts"].size,
+                             self._raw(pdir)["ts"].size, size))
+        return rows
+
+
+def parse_time(s):
+    """Czas z linii poleceń: sekundy epoch albo data ISO (bez strefy = UTC)."""
+    if s is None:
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+
+
+def append_jsonl(store, fh):
+    """Dopisuje odczyty JSONL (format ingest.py --emit: napięcie w V)."""
+    total = 0
+    while True:
+        lines = list(islice(fh, APPEND_LINES))
+        if not lines:
+            return total
+        recs = [json.loads(ln) for ln in lines if ln.strip()]
+        if not recs:
+            continue
+
+        def col(key, scale=1.0):
+            return np.array([np.nan if r.get(key) is None else r[key] * scale for r in recs])
+        total += store.append(col("ts"), [r["mac"] for r in recs], col("temperature"),
+                              col("voltage", 1000.0), col("battery"), col("count"))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Kolumnowy magazyn historii odczytów czujników.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("append", help="dopisz odczyty JSONL (ingest.py --emit)")
+    p.add_argument("root")
+    p.add_argument("input", nargs="?", default="-", help="plik JSONL lub '-' (stdin)")
+    p = sub.add_parser("seal", help="zamknij segmenty sprzed bieżącego miesiąca")
+    p.add_argument("root")
+    p.add_argument("--all", action="store_true", help="zamknij także bieżący miesiąc")
+    p = sub.add_parser("query", help="odczyty jednego czujnika (CSV na stdout)")
+    p.add_argument("root")
+    p.add_argument("mac")
+    p.add_argument("--from", dest="t_from", default=None, help="od (epoch lub ISO, UTC)")
+    p.add_argument("--to", dest="t_to", default=None, help="do (wyłącznie)")
+    p = sub.add_parser("info", help="segmenty i rozmiar na dysku")
+    p.add_argument("root")
+    a = ap.parse_args(argv)
+
+    store = HistoryStore(a.root)
+    t0 = time.perf_counter()
+    if a.cmd == "append":
+        fh = sys.stdin if a.input == "-" else open(a.input, encoding="utf-8")
+        n = append_jsonl(store, fh)
+        print(f"Dopisano {n} odczytów w {time.perf_counter() - t0:.2f} s"
+              f"{f', odrzucono {store.rejected} (brak/zły czas)' if store.rejected else ''}.", file=sys.stderr)
+    elif a.cmd == "seal":
+        for part, n in store.seal_closed(all_=a.all).items():
+            print(f"{part}: {n} odczytów zamkniętych", file=sys.stderr)
+    elif a.cmd == "query":
+        r = store.query(a.mac, parse_time(a.t_from), parse_time(a.t_to))
+        print("ts,temperature_C,vbat_mV,battery_pct,count")
+        for ts, t, v, b, c in zip(r["ts"].tolist(), r["temp"].tolist(), r["vbat"].tolist(),
+                                  r["battery"].tolist(), r["count"].tolist()):
+            print(f"{ts},{'' if t == TEMP_NONE else f'{t / 100:.2f}'},{v or ''},"
+                  f"{'' if b == BATT_NONE else b},{c}")
+        print(f"{r['ts'].size} odczytów w {1000 * (time.perf_counter() - t0):.1f} ms", file=sys.stderr)
+    else:
+        print(f"{'segment':<8} {'zamknięte':>12} {'.raw':>10} {'MB':>9}")
+        for part, ns, nr, size in store.info():
+            print(f"{part:<8} {ns:>12d} {nr:>10d} {size / 1e6:>9.2f}")
+        print(f"czujników: {len(store.macs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingest reklam BTHome z bramek: deduplikacja, bufory pierścieniowe per czujnik, luki w bootcount.
+
+- Źródła (asyncio): pliki logów, stdin, lokalny UDP (jedna lub wiele linii na datagram).
+  Format linii: "czas MAC hex_reklamy [bramka] [rssi]" (separator: spacja, przecinek lub ';');
+  czas: sekundy epoch albo ISO 8601.
+- Każde wybudzenie nadaje tę samą reklamę 3× (sendBeacon(..., 3)), a kilka bramek słyszy
+  ten sam czujnik → deduplikacja po (MAC, bootcount) w ograniczonym oknie LRU; klucz
+  starszy niż DEDUP_S to nowy odczyt (bootcount po resecie liczy od nowa).
+- Per czujnik: SensorState (__slots__) z buforem pierścieniowym na tablicach array
+  (centy-°C int16, mV uint16, % uint8, licznik uint32, czas float64); ostatnia wartość O(1).
+- Luki w bootcount → pominięte wybudzenia; spadek licznika → reset (utrata zasilania RTC),
+  chyba że to spóźniona reklama (starszy czas odbioru, w oknie REORDER_WINDOW).
+- Pamięć ograniczona: ring × max_sensors + okno LRU (najdawniej widziane czujniki usuwane).
+
+Przykład:
+  python tools/ingest.py gw1.log gw2.log
+  python tools/ingest.py --udp 127.0.0.1:5140 --emit > odczyty.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+from bthome_decode import DecodeError, decode
+
+RING_SIZE = 64
+LRU_SIZE = 1 << 16
+MAX_SENSORS = 10000
+REORDER_WINDOW = 16
+DEDUP_S = 30.0           # maks. rozrzut czasu kopii jednej reklamy (bramki, zegary)
+QUEUE_BATCHES = 64
+READ_HINT = 1 << 16      # bajtów na porcję linii z pliku
+
+
+class SensorState:
+    """Stan jednego czujnika z buforem pierścieniowym ostatnich odczytów."""
+
+    __slots__ = ("mac", "ts", "temp_c", "vbat_mV", "battery", "count", "head", "size",
+                 "last_count", "received", "missed", "resets", "late")
+
+    def __init__(self, mac, ring=RING_SIZE):
+        self.mac = mac
+        self.ts = array("d", bytes(8 * ring))
+        self.temp_c = array("h", bytes(2 * ring))      # setne °C
+        self.vbat_mV = array("H", bytes(2 * ring))
+        self.battery = array("B", bytes(ring))
+        self.count = array("I", bytes(4 * ring))
+        self.head = 0            # indeks następnego zapisu
+        self.size = 0
+        self.last_count = None
+        self.received = 0
+        self.missed = 0
+        self.resets = 0
+        self.late = 0
+
+    def push(self, ts, temp, vbat, batt, count):
+        i = self.head
+        self.ts[i] = ts
+        self.temp_c[i] = max(-32768, min(32767, round(temp * 100))) if temp is not None else -32768
+        self.vbat_mV[i] = max(0, min(65535, round(vbat * 1000))) if vbat is not None else 0
+        self.battery[i] = batt if batt is not None else 255
+        self.count[i] = count
+        cap = len(self.ts)
+        self.head = (i + 1) % cap
+        if self.size < cap:
+            self.size += 1
+
+    def latest(self):
+        """Ostatni odczyt (czas, °C, V, %, bootcount) lub None – O(1)."""
+        if not self.size:
+            return None
+        i = self.head - 1          # -1 → ostatni element tablicy
+        return (self.ts[i], self.temp_c[i] / 100.0, self.vbat_mV[i] / 1000.0,
+                self.battery[i], self.count[i])
+
+    def history(self):
+        """Odczyty z bufora od najstarszego."""
+        cap = len(self.ts)
+        start = (self.head - self.size) % cap
+        for k in range(self.size):
+            i = (start + k) % cap
+            yield (self.ts[i], self.temp_c[i] / 100.0, self.vbat_mV[i] / 1000.0,
+                   self.battery[i], self.count[i])
+
+
+class Fleet:
+    """Flota czujników: deduplikacja (MAC, bootcount) + stany per MAC."""
+
+    def __init__(self, ring=RING_SIZE, lru=LRU_SIZE, max_sensors=MAX_SENSORS, dedup_s=DEDUP_S):
+        self.ring = ring
+        self.lru_size = lru
+        self.dedup_s = dedup_s
+        self.max_sensors = max_sensors
+        self.seen = OrderedDict()            # (mac, count) → czas, okno LRU
+        self.sensors = OrderedDict()         # mac → SensorState, od najdawniej widzianego
+        self.duplicates = 0
+        self.errors = 0
+        self.accepted = 0
+
+    def latest(self, mac):
+        st = self.sensors.get(mac)
+        return st.latest() if st else None
+
+    def ingest(self, ts, mac, payload):
+        """Przyjmuje jedną reklamę; zwraca zdekodowany słownik albo None (duplikat/błąd)."""
+        try:
+            vals = decode(payload)
+        except DecodeError:
+            self.errors += 1
+            return None
+        count = vals.get("count")
+        if count is None:
+            self.errors += 1
+            return None
+        key = (mac, count)
+        t_seen = self.seen.get(key)
+        if t_seen is not None and abs(ts - t_seen) <= self.dedup_s:
+            self.seen.move_to_end(key)
+            self.duplicates += 1
+            return None
+        self.seen[key] = ts
+        self.seen.move_to_end(key)
+        if len(self.seen) > self.lru_size:
+            self.seen.popitem(last=False)
+
+        st = self.sensors.get(mac)
+        if st is None:
+            st = self.sensors[mac] = SensorState(mac, self.ring)
+            if len(self.sensors) > self.max_sensors:
+                self.sensors.popitem(last=False)
+        else:
+            self.sensors.move_to_end(mac)
+        st.received += 1
+        last = st.last_count
+        if last is not None and count < last:
+            if last - count <= REORDER_WINDOW and ts < st.ts[st.head - 1]:
+                # spóźniona reklama (bramka z buforem) – była liczona jako pominięta
+                st.late += 1
+                st.missed = max(0, st.missed - 1)
+                self.accepted += 1
+                return vals
+            st.resets += 1
+            last = None
+        if last is not None and count > last + 1:
+            st.missed += count - last - 1
+        st.last_count = count
+        st.push(ts, vals.get("temperature"), vals.get("voltage"), vals.get("battery"), count)
+        self.accepted += 1
+        return vals
+
+
+def parse_time(s):
+    try:
+        return float(s)
+    except ValueError:
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).timestamp()
+
+
+def parse_line(line):
+    """'czas MAC hex …' → (czas, MAC, bytes) lub None."""
+    parts = line.replace(",", " ").replace(";", " ").split()
+    if len(parts) < 3:
+        return None
+    try:
+        return parse_time(parts[0]), parts[1].upper(), bytes.fromhex(parts[2])
+    except ValueError:
+        return None
+
+
+# --- Źródła ---
+
+async def _read_batches(fh, queue):
+    """Wiersze z otwartego pliku paczkami (~READ_HINT bajtów) czytanymi w wątku."""
+    while True:
+        lines = await asyncio.to_thread(fh.readlines, READ_HINT)
+        if not lines:
+            break
+        await queue.put(lines)
+
+
+async def read_file(path, queue):
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        await _read_batches(fh, queue)
+
+
+async def read_stdin(queue):
+    if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+        # `< plik` – transport potoku nie obsługuje zwykłych plików
+        with open(sys.stdin.fileno(), encoding="utf-8", errors="replace", closefd=False) as fh:
+            await _read_batches(fh, queue)
+        return
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=1 << 20)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        await queue.put([line.decode("utf-8", "replace")])
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, queue):
+        self.queue = queue
+
+    def datagram_received(self, data, addr):
+        try:
+            self.queue.put_nowait(data.decode("utf-8", "replace").splitlines())
+        except asyncio.QueueFull:
+            pass                 # przeciążenie – datagram porzucony (jak w sieci)
+
+
+async def serve_udp(host, port, queue, duration=None):
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(queue),
+                                                       local_addr=(host, port))
+    try:
+        if duration:
+            await asyncio.sleep(duration)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        transport.close()
+
+
+async def consume(queue, fleet, emit=None):
+    while True:
+        lines = await queue.get()
+        if lines is None:
+            break
+        for line in lines:
+            rec = parse_line(line)
+            if rec is None:
+                fleet.errors += 1
+                continue
+            vals = fleet.ingest(*rec)
+            if vals is not None and emit is not None:
+                emit.write(json.dumps({"ts": rec[0], "mac": rec[1], **vals}) + "\n")
+
+
+async def run(files=(), stdin=False, udp=None, duration=None, fleet=None, emit=None):
+    fleet = fleet or Fleet()
+    queue = asyncio.Queue(QUEUE_BATCHES)
+    consumer = asyncio.create_task(consume(queue, fleet, emit))
+    producers = [read_file(p, queue) for p in files]
+    if stdin:
+        producers.append(read_stdin(queue))
+    if udp:
+        host, _, port = udp.rpartition(":")
+        producers.append(serve_udp(host or "127.0.0.1", int(port), queue, duration))
+    try:
+        await asyncio.gather(*producers)
+    finally:
+        await queue.put(None)
+        await consumer
+    return fleet
+
+
+def print_summary(fleet, out=sys.stderr):
+    print(f"Przyjęte: {fleet.accepted}, duplikaty: {fleet.duplicates}, błędy: {fleet.errors}, "
+          f"czujników: {len(fleet.sensors)}", file=out)
+    print(f"{'MAC':<17} {'T[°C]':>7} {'VBAT[V]':>8} {'bat%':>4} {'boot':>8} "
+          f"{'odebr.':>7} {'pomin.':>6} {'reset':>5}", file=out)
+    for mac, st in fleet.sensors.items():
+        ts, t, v, b, c = st.latest()
+        print(f"{mac:<17} {t:>7.2f} {v:>8.3f} {b:>4d} {c:>8d} {st.received:>7d} "
+              f"{st.missed:>6d} {st.resets:>5d}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingest reklam BTHome: deduplikacja i stan floty.")
+    ap.add_argument("files", nargs="*", help="pliki logów bramek")
+    ap.add_argument("--stdin", action="store_true", help="czytaj także ze stdin")
+    ap.add_argument("--udp", default=None, help="HOST:PORT lokalnego nasłuchu UDP")
+    ap.add_argument("--duration", type=float, default=None, help="czas nasłuchu UDP [s]")
+    ap.add_argument("--ring", type=int, default=RING_SIZE, help="odczytów w buforze na czujnik")
+    ap.add_argument("--lru", type=int, default=LRU_SIZE, help="okno deduplikacji (klucze)")
+    ap.add_argument("--max-sensors", type=int, default=MAX_SENSORS)
+    ap.add_argument("--dedup-s", type=float, default=DEDUP_S, help="okno czasowe deduplikacji [s]")
+    ap.add_argument("--emit", action="store_true", help="przyjęte odczyty jako JSONL na stdout")
+    a = ap.parse_args(argv)
+    if not (a.files or a.stdin or a.udp):
+        ap.error("podaj pliki, --stdin lub --udp")
+
+    fleet = Fleet(a.ring, a.lru, a.max_sensors, a.dedup_s)
+    try:
+        asyncio.run(run(a.files, a.stdin, a.udp, a.duration, fleet, sys.stdout if a.emit else None))
+    except KeyboardInterrupt:
+        pass
+    print_summary(fleet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opcjonalne pomiary kalkulatorów: czasy nazwanych etapów, liczniki, cProfile i tracemalloc.
+
+- Etapy jak okrążenia stopera: stage("nazwa") zamyka poprzedni etap i otwiera nowy
+  (bez przebudowy kodu na bloki with); stop() zamyka ostatni i zwraca raport (słownik → JSON).
+- count("nazwa", k): liczniki (np. symulowane dni, scenariusze).
+- cProfile (plik .prof, `python -m pstats plik.prof`) i tracemalloc (szczyt pamięci per etap,
+  najwięksi alokujący w raporcie, snapshot do pliku) – tylko na żądanie.
+- Wyłączony Profiler (domyślnie) nic nie mierzy: każda metoda kończy się na jednym if.
+- from_env(): CALC_PROFILE=1 → raport czasów, CALC_PROFILE=plik.json → raport do pliku;
+  samo --profile-out też włącza pomiar.
+"""
+
+import json
+import os
+import sys
+import time
+
+ENV = "CALC_PROFILE"
+TOP_ALLOC = 10       # najwięksi alokujący w raporcie tracemalloc
+
+
+class Profiler:
+    """Stoper etapów z licznikami; enabled=False → brak narzutu."""
+
+    def __init__(self, enabled=False, cprofile=None, tracemalloc=None):
+        self.enabled = enabled or bool(cprofile) or bool(tracemalloc)
+        self.cprofile_path = cprofile
+        self.tracemalloc_path = tracemalloc
+        self.stages = []             # [nazwa, czas [s], szczyt pamięci [B] lub None]
+        self.counters = {}
+        self._name = None
+        self._t = self._t0 = None
+        self._prof = None
+
+    def start(self):
+        if not self.enabled:
+            return self
+        if self.tracemalloc_path:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile_path:
+            import cProfile
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        self._t0 = self._t = time.perf_counter()
+        return self
+
+    def _close(self, now):
+        if self._name is None:
+            return
+        peak = None
+        if self.tracemalloc_path:
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self.stages.append([self._name, now - self._t, peak])
+
+    def stage(self, name):
+        """Koniec poprzedniego etapu, początek etapu name."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._close(now)
+        self._name, self._t = name, now
+
+    def count(self, name, k=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def stop(self, extra=None):
+        """Zamyka ostatni etap, zapisuje cProfile/tracemalloc; zwraca raport (None gdy wyłączony)."""
+        if not self.enabled:
+            return None
+        now = time.perf_counter()
+        self._close(now)
+        self._name = None
+        rep = {"total_s": now - self._t0,
+               "stages": [{"name": n, "seconds": dt, **({} if pk is None else {"peak_kib": round(pk / 1024.0, 1)})}
+                          for n, dt, pk in self.stages],
+               "counters": dict(self.counters)}
+        if self._prof is not None:
+            self._prof.disable()
+            self._prof.dump_stats(self.cprofile_path)
+            rep["cprofile"] = self.cprofile_path
+            self._prof = None
+        if self.tracemalloc_path:
+            import tracemalloc
+            snap = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            snap.dump(self.tracemalloc_path)
+            rep["tracemalloc"] = self.tracemalloc_path
+            rep["top_alloc"] = [{"where": str(s.traceback), "kib": round(s.size / 1024.0, 1), "count": s.count}
+                                for s in snap.statistics("lineno")[:TOP_ALLOC]]
+        if extra:
+            rep.update(extra)
+        return rep
+
+
+def from_env(enabled=False, output=None):
+    """(włączony?, plik raportu) z flag CLI uzupełnionych zmienną CALC_PROFILE; plik raportu włącza pomiar."""
+    val = os.environ.get(ENV, "").strip()
+    if val and val != "0":
+        enabled = True
+        if val != "1" and output is None:
+            output = val
+    return enabled or bool(output), output
+
+
+def emit(report, output=None, out=sys.stdout):
+    """Raport jako blok JSON: do pliku (output) albo na out pod nagłówkiem [Profil]."""
+    if report is None:
+        return
+    text = json.dumps(report, indent=1, ensure_ascii=False)
+    if output:
+        with open(output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print("\n[Profil]\n" + text, file=out)
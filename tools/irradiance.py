@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Godzinowe dane nasłonecznienia z lokalnych plików CSV (PVGIS seriescalc / TMY i podobne).
+
+- Parser strumieniowy: plik czytany porcjami po CHUNK_LINES wierszy, wynik dopisywany
+  binarnie do pliku tymczasowego – cały CSV nigdy nie jest trzymany w listach Pythona.
+- Pierwsze wczytanie tworzy cache <plik>.hourly.npy (rekordy: data YYYYMMDD, godzina,
+  G [W/m²]); kolejne uruchomienia mapują go w pamięć (mmap) zamiast parsować CSV.
+  Cache jest odświeżany, gdy CSV jest nowszy niż cache.
+- Kolumna irradiancji: pierwsza z IRRADIANCE_COLUMNS (G(i) – płaszczyzna panelu, potem
+  G(h)/GHI – poziomo); kolumna czasu: 'time…' (YYYYMMDD:HHMM lub YYYY-MM-DD HH:MM).
+
+Wynik do kalkulatorów: dzienne PSH [h] (daily_psh) lub średnie miesięczne (monthly_psh),
+zamiennik BASE_PSH_MONTH.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+CHUNK_LINES = 65536
+IRRADIANCE_COLUMNS = ("G(i)", "G(h)", "GHI", "ghi", "G_h", "Gh")
+RECORD = np.dtype([("date", "<i4"), ("hour", "u1"), ("g", "<f4")])
+
+
+def _find_header(fh):
+    # nagłówek PVGIS poprzedzony jest metadanymi; szukamy wiersza z 'time' i kolumną G
+    for line in fh:
+        low = line.lower()
+        if "time" not in low:
+            continue
+        delim = max((",", ";", "\t"), key=line.count)
+        cols = [c.strip() for c in line.strip().split(delim)]
+        gi = next((cols.index(c) for c in IRRADIANCE_COLUMNS if c in cols), None)
+        ti = next((i for i, c in enumerate(cols) if c.lower().startswith("time")), None)
+        if gi is not None and ti is not None:
+            return delim, ti, gi
+    raise ValueError(f"Nie znaleziono nagłówka z kolumną czasu i irradiancji {IRRADIANCE_COLUMNS}.")
+
+
+def _split_time(s):
+    # 'YYYYMMDD:HHMM' (PVGIS) lub 'YYYY-MM-DD HH:MM' / 'YYYY-MM-DDTHH:MM' (ISO)
+    if s[4] == "-":
+        return int(s[0:4] + s[5:7] + s[8:10]), int(s[11:13] or 0)
+    return int(s[0:8]), int(s[9:11] or 0)
+
+
+def _parse_chunk(lines, delim, ti, gi):
+    rec = np.empty(len(lines), dtype=RECORD)
+    for i, ln in enumerate(lines):
+        f = ln.split(delim)
+        rec[i] = _split_time(f[ti].strip()) + (float(f[gi]),)
+    return rec
+
+
+def parse_csv(csv_path, out_fh, chunk_lines=CHUNK_LINES):
+    """Strumieniowo parsuje CSV i dopisuje rekordy RECORD do out_fh. Zwraca liczbę rekordów."""
+    n = 0
+    with open(csv_path, encoding="utf-8", errors="replace") as fh:
+        delim, ti, gi = _find_header(fh)
+        chunk = []
+        for line in fh:
+            if not line[:1].isdigit():
+                if n or chunk:
+                    break          # stopka PVGIS po danych
+                continue
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                _parse_chunk(chunk, delim, ti, gi).tofile(out_fh)
+                n += len(chunk)
+                chunk = []
+        if chunk:
+            _parse_chunk(chunk, delim, ti, gi).tofile(out_fh)
+            n += len(chunk)
+    return n
+
+
+def cache_path(csv_path):
+    return csv_path + ".hourly.npy"
+
+
+def build_cache(csv_path, npy_path=None):
+    """Konwertuje CSV → .npy (zapis atomowy: plik tymczasowy + os.replace)."""
+    npy_path = npy_path or cache_path(csv_path)
+    raw_tmp, npy_tmp = npy_path + ".raw.tmp", npy_path + ".tmp"
+    try:
+        with open(raw_tmp, "wb") as raw:
+            n = parse_csv(csv_path, raw)
+        if n == 0:
+            raise ValueError(f"Brak danych godzinowych w {csv_path}.")
+        with open(npy_tmp, "wb") as out, open(raw_tmp, "rb") as raw:
+            np.lib.format.write_array_header_1_0(
+                out, {"descr": np.lib.format.dtype_to_descr(RECORD),
+                      "fortran_order": False, "shape": (n,)})
+            while True:
+                buf = raw.read(1 << 20)
+                if not buf:
+                    break
+                out.write(buf)
+        os.replace(npy_tmp, npy_path)
+    finally:
+        for p in (raw_tmp, npy_tmp):
+            if os.path.exists(p):
+                os.remove(p)
+    return npy_path
+
+
+def load_hourly(csv_path, refresh=False):
+    """Zwraca rekordy godzinowe (memmap tylko do odczytu); przy braku cache buduje go z CSV."""
+    npy = cache_path(csv_path)
+    if refresh or not os.path.exists(npy) or os.path.getmtime(npy) < os.path.getmtime(csv_path):
+        build_cache(csv_path, npy)
+    return np.load(npy, mmap_mode="r")
+
+
+def daily_psh(hourly):
+    """(daty YYYYMMDD, PSH [h]) – suma irradiancji dnia / 1000 W/m², z uwzględnieniem kroku danych."""
+    dates, inv = np.unique(np.asarray(hourly["date"]), return_inverse=True)
+    g = np.asarray(hourly["g"], dtype=float)
+    total = np.bincount(inv, weights=np.clip(g, 0.0, None))
+    count = np.bincount(inv)
+    return dates, total / 1000.0 * (24.0 / count)
+
+
+def monthly_psh(hourly):
+    """Średni dzienny PSH [h] dla miesięcy Jan..Dec (zamiennik BASE_PSH_MONTH)."""
+    dates, psh = daily_psh(hourly)
+    month = (dates // 100) % 100 - 1
+    total = np.bincount(month, weights=psh, minlength=12)
+    count = np.bincount(month, minlength=12)
+    if (count == 0).any():
+        raise ValueError("Plik nie pokrywa wszystkich 12 miesięcy.")
+    return (total / count).tolist()
+
+
+def site_psh_month(csv_path):
+    """Średnie miesięczne PSH dla pliku CSV (przez cache .npy)."""
+    return monthly_psh(load_hourly(csv_path))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Użycie: python tools/irradiance.py plik.csv [--refresh]")
+        sys.exit(1)
+    import time
+    t0 = time.perf_counter()
+    hourly = load_hourly(sys.argv[1], refresh="--refresh" in sys.argv)
+    t1 = time.perf_counter()
+    psh = monthly_psh(hourly)
+    from solar_model import MONTH_NAMES_PL as names
+    print(f"Rekordów godzinowych: {hourly.shape[0]}  (wczytanie {1000 * (t1 - t0):.1f} ms)")
+    print("PSH [h/d]: " + "  ".join(f"{n.upper()} {v:.2f}" for n, v in zip(names, psh)))
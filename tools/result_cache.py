@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wspólna pamięć wyników kalkulatorów (segment_time, profil SOC, dark-streak, kalibracja, sweep).
+
+- Klucz: znacznik wersji modelu + znormalizowane argumenty (int/float → float, -0.0 → 0.0,
+  listy/krotki → krotki, słowniki posortowane, tablice NumPy → dtype, kształt i skrót SHA-256
+  danych). Zmiana modelu = nowy znacznik → stare wyniki nie są używane.
+- W procesie: LRU z limitem rozmiaru (CALC_CACHE_MB, domyślnie 64 MB; rozmiar = nbytes tablic
+  + sys.getsizeof pozostałych obiektów). Na dysku (opcjonalnie, CALC_CACHE_DIR lub --cache-dir):
+  jeden plik na klucz, zapis atomowy (plik tymczasowy + os.replace).
+- Wyniki współdzielone bezpiecznie: tablice NumPy zapamiętane tylko do odczytu, słowniki i listy
+  kopiowane przy każdym zwrocie – modyfikacja wyniku przez wywołującego nie zmienia pamięci.
+- PointCache: wyniki sweepów per punkt siatki (wiersz parametrów) w jednym pliku .npz na
+  kontekst – powtórzony sweep liczy tylko nowe punkty.
+- CALC_CACHE=0 wyłącza pamięć (np. do pomiarów czasu).
+- Import bez NumPy (tablice rozpoznawane po __array_interface__).
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from collections import OrderedDict
+
+_MISS = object()
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def normalize(x):
+    """Postać kanoniczna argumentu (hashowalna krotka/skalar)."""
+    if isinstance(x, bool) or x is None or isinstance(x, str):
+        return x
+    if isinstance(x, (int, float)):
+        x = float(x)
+        return 0.0 if x == 0.0 else x
+    if isinstance(x, (list, tuple)):
+        return tuple(normalize(v) for v in x)
+    if isinstance(x, dict):
+        return tuple(sorted((str(k), normalize(v)) for k, v in x.items()))
+    if hasattr(x, "__array_interface__"):
+        if getattr(x, "ndim", 1) == 0:
+            return normalize(x.item())
+        import numpy as np
+        a = np.ascontiguousarray(x)
+        if a.dtype.kind in "iuf":
+            a = a.astype(np.float64) + 0.0             # wspólny typ, -0.0 → 0.0
+        return ("ndarray", str(a.dtype), a.shape, hashlib.sha256(a.tobytes()).hexdigest())
+    if hasattr(x, "_asdict"):
+        return normalize(tuple(x))
+    return repr(x)
+
+
+def make_key(tag, args=(), kwargs=None):
+    return (tag, normalize(args), normalize(kwargs or {}))
+
+
+def key_digest(key):
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+def _size_of(x):
+    """Przybliżony rozmiar wartości w pamięci [B]: nbytes tablic + sys.getsizeof reszty."""
+    nbytes = getattr(x, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    size = sys.getsizeof(x)
+    if isinstance(x, dict):
+        size += sum(_size_of(k) + _size_of(v) for k, v in x.items())
+    elif isinstance(x, (list, tuple)):
+        size += sum(_size_of(v) for v in x)
+    return size
+
+
+def _frozen(x):
+    """Wynik do współdzielenia: tablice tylko do odczytu (własna kopia danych), nowe dict/list."""
+    if isinstance(x, dict):
+        return {k: _frozen(v) for k, v in x.items()}
+    if isinstance(x, list):
+        return [_frozen(v) for v in x]
+    if isinstance(x, tuple):
+        items = [_frozen(v) for v in x]
+        return type(x)(*items) if hasattr(x, "_fields") else tuple(items)
+    if hasattr(x, "__array_interface__") and hasattr(x, "setflags"):
+        if x.base is not None:                      # widok/memmap – dane mogą zmienić się u źródła
+            x = x.copy()
+        if x.flags.writeable:
+            x.setflags(write=False)
+    return x
+
+
+class ResultCache:
+    """LRU w pamięci (limit bajtów) + opcjonalny katalog na dysku."""
+
+    def __init__(self, max_bytes=64 << 20, disk_dir=None, enabled=True):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.enabled = enabled
+        self._mem = OrderedDict()          # klucz → (wartość, rozmiar)
+        self.size = 0
+        self.hits = self.misses = self.disk_hits = 0
+
+    def _path(self, key):
+        h = key_digest(key)
+        return os.path.join(self.disk_dir, h[:2], h + ".pkl")
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        item = self._mem.get(key, _MISS)
+        if item is not _MISS:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return _frozen(item[0])
+        if self.disk_dir:
+            try:
+                with open(self._path(key), "rb") as fh:
+                    blob = fh.read()
+                value = _frozen(pickle.loads(blob))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+            else:
+                self.disk_hits += 1
+                self._remember(key, value, _size_of(value))
+                return _frozen(value)
+        self.misses += 1
+        return default
+
+    def _remember(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self.size -= old[1]
+        self._mem[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, s) = self._mem.popitem(last=False)
+            self.size -= s
+
+    def put(self, key, value):
+        if not self.enabled:
+            return value
+        value = _frozen(value)
+        if self.disk_dir:
+            _atomic_write(self._path(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._remember(key, value, _size_of(value))
+        return _frozen(value)
+
+    def clear(self):
+        self._mem.clear()
+        self.size = 0
+
+    def info(self):
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "entries": len(self._mem), "bytes": self.size}
+
+
+DEFAULT = ResultCache(max_bytes=int(float(os.environ.get("CALC_CACHE_MB", 64)) * (1 << 20)),
+                      disk_dir=os.environ.get("CALC_CACHE_DIR") or None,
+                      enabled=os.environ.get("CALC_CACHE", "1") != "0")
+
+
+def cached(tag, cache=None):
+    """Dekorator: wynik funkcji zapamiętany pod (tag, znormalizowane argumenty)."""
+    def deco(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            c = cache or DEFAULT
+            if not c.enabled:
+                return func(*args, **kwargs)
+            key = make_key(tag, args, kwargs)
+            value = c.get(key, _MISS)
+            if value is _MISS:
+                value = c.put(key, func(*args, **kwargs))
+            return value
+        wrapper.uncached = func
+        wrapper.cache_tag = tag
+        return wrapper
+    return deco
+
+
+class PointCache:
+    """
+    Wyniki per punkt siatki: wiersze parametrów (float64) → wiersze wyników (float64).
+    Jeden plik .npz na kontekst (znacznik + parametry wspólne dla całego sweepa).
+    """
+
+    def __init__(self, tag, context=(), cache=None):
+        self.cache = cache or DEFAULT
+        self.key = make_key(tag, context)
+        self._keys = self._vals = None
+
+    def _path(self):
+        return os.path.join(self.cache.disk_dir, "points", key_digest(self.key) + ".npz")
+
+    def _load(self):
+        import numpy as np
+        if self._keys is not None:
+            return
+        got = self.cache.get(self.key)
+        if got is None and self.cache.enabled and self.cache.disk_dir and os.path.exists(self._path()):
+            with np.load(self._path()) as z:
+                got = (z["keys"], z["vals"])
+        self._keys, self._vals = got if got is not None else (None, None)
+
+    def lookup(self, params):
+        """params: n × k → (maska znalezionych, wyniki n × m lub None)."""
+        import numpy as np
+        params = np.ascontiguousarray(params, dtype=np.float64) + 0.0
+        n = params.shape[0]
+        self._load()
+        if not self.cache.enabled or self._keys is None or self._keys.shape[1] != params.shape[1]:
+            return np.zeros(n, bool), None
+        v = np.dtype((np.void, params.shape[1] * 8))
+        known = self._keys.view(v).ravel()
+        order = np.argsort(known)
+        q = params.view(v).ravel()
+        pos = np.clip(np.searchsorted(known[order], q), 0, known.size - 1)
+        found = known[order][pos] == q
+        vals = np.full((n, self._vals.shape[1]), np.nan)
+        vals[found] = self._vals[order[pos[found]]]
+        return found, vals
+
+    def store(self, params, values):
+        """Dopisuje nowe punkty (wiersze) i zapisuje kontekst (pamięć + dysk, atomowo)."""
+        import io
+
+        import numpy as np
+        if not self.cache.enabled:
+            return
+        params = np.ascontiguousarray(params, dtype=np.float64) + 0.0
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        self._load()
+        if self._keys is not None and self._keys.shape[1] == params.shape[1]:
+            params = np.concatenate([self._keys, params])
+            values = np.concatenate([self._vals, values])
+        self._keys, self._vals = params, values
+        self.cache._remember(self.key, (params, values), params.nbytes + values.nbytes)
+        if self.cache.disk_dir:
+            buf = io.BytesIO()
+            np.savez(buf, keys=params, vals=values)
+            _atomic_write(self._path(), buf.getvalue())
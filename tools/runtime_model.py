@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model czasu pracy na samej baterii (consumption-calc-simple.py, consumption-calc-4points.py).
+
+- evaluate(): stały prąd → czas do U_safe / U_cutoff (pojemność do progu z krzywej OCV).
+- segment_time() / evaluate_segments(): prąd zależny od napięcia (segmenty między punktami U).
+- Czyste funkcje bez input()/print(), bez NumPy (import < 50 ms); wsadowo: batch.py runtime|segments.
+"""
+
+from cell_model import U_CUTOFF, U_FULL, U_SAFE, get_cell
+from result_cache import cached
+
+CELL = "fw"  # typ ogniwa (cell_model.CELLS): krzywa OCV z firmware; "linear" = dawny model liniowy
+U_POINTS = (4.2, 3.7, 3.5, 3.3)
+
+
+def format_time(hours_float):
+    """Zamienia godziny float na 'X h Y min' i ew. dodaje dni."""
+    if hours_float == float('inf'):
+        return "∞ (nieskończoność)"
+    hours = int(hours_float)
+    minutes = int(round((hours_float - hours) * 60))
+    if minutes == 60:
+        hours += 1
+        minutes = 0
+    days_info = f" (~{hours_float/24:.2f} dni)" if hours_float >= 24 else ""
+    return f"{hours} h {minutes} min (~{hours_float:.2f} h){days_info}"
+
+
+def evaluate(current_mA, capacity_mAh, cell=CELL):
+    """Czas pracy przy stałym prądzie [h] do U_safe i U_cutoff (inf przy prądzie ≤ 0) oraz pojemności do tych progów [mAh]."""
+    cell = get_cell(cell)
+    cap_safe_mAh = capacity_mAh * cell.charge_fraction(U_FULL, U_SAFE)
+    cap_cutoff_mAh = capacity_mAh * cell.charge_fraction(U_FULL, U_CUTOFF)  # = 1.0
+    return {
+        "cap_safe_mAh": cap_safe_mAh,
+        "cap_cutoff_mAh": cap_cutoff_mAh,
+        "time_safe_h": cap_safe_mAh / current_mA if current_mA > 0 else float('inf'),
+        "time_cutoff_h": cap_cutoff_mAh / current_mA if current_mA > 0 else float('inf'),
+    }
+
+
+@cached("segment_time/ocv-1")
+def segment_time(capacity_mAh, U_points, I_points, U_cutoff=3.3, cell="fw"):
+    """
+    capacity_mAh - pojemność ogniwa [mAh]
+    U_points - lista napięć [V] (malejąca, np. [4.2, 3.7, 3.5, 3.3])
+    I_points - lista prądów [mA] odpowiadających napięciom
+    U_cutoff - napięcie końcowe [V]
+    cell - typ ogniwa (cell_model) – pojemność segmentu z krzywej OCV
+    """
+    cell = get_cell(cell)
+    U_full, U_end = U_points[0], U_cutoff
+    usable_fraction = cell.charge_fraction(U_full, 3.0)  # pełny zakres użyteczny
+
+    total_time_h = 0.0
+
+    for i in range(len(U_points) - 1):
+        U_high, U_low = U_points[i], U_points[i + 1]
+        I_high, I_low = I_points[i], I_points[i + 1]
+
+        if U_low < U_cutoff:
+            U_low = U_cutoff
+        if U_high <= U_cutoff:
+            break
+
+        # pojemność przypisana do tego segmentu
+        segment_capacity = capacity_mAh * (cell.charge_fraction(U_high, U_low) / usable_fraction)
+
+        # średni prąd w segmencie
+        avg_current = (I_high + I_low) / 2.0
+
+        # czas pracy w tym segmencie [h]
+        time_h = segment_capacity / avg_current
+        total_time_h += time_h
+
+    return total_time_h
+
+
+def evaluate_segments(capacity_mAh, I_points, U_points=U_POINTS, U_cutoff=3.3, cell=CELL):
+    """segment_time() dla scenariusza wsadowego (listy z JSON)."""
+    if len(I_points) != len(U_points):
+        raise ValueError(f"I_points: {len(I_points)} wartości, U_points: {len(U_points)}.")
+    return {"time_h": segment_time(capacity_mAh, list(U_points), list(I_points), U_cutoff=U_cutoff, cell=cell)}
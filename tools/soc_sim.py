@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wektorowy silnik symulacji SOC (stan naładowania) dla kalkulatora 1S + PV.
+
+- Wejście: dzienne uzyski i zużycie [mWh/d] jako tablice (1-D: jeden scenariusz,
+  2-D: wiele scenariuszy × dni).
+- Reguła jak w pętli z solar_runtime_calc_v4.py: soc += uzysk - zużycie,
+  potem obcięcie od góry do pojemności baterii; domyślnie bez obcięcia od dołu (opcja floor).
+- Wynik zgodny bit w bit z pętlą dzień po dniu (te same dodawania w tej samej kolejności).
+- steady_state(): okresowy stan ustalony (kolejne lata, nie tylko pierwszy rok od pełnej
+  baterii) z 12 agregatów miesięcznych – bez symulacji wielu lat.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+SocResult = namedtuple("SocResult", "soc soc_min min_day min_month")
+SteadyState = namedtuple("SteadyState", "soc_start soc_end_month soc_min min_month sustainable")
+
+
+def daily_series(values_month, days_month):
+    """Rozwija wartości miesięczne na dzienne (ostatnia oś = miesiące)."""
+    return np.repeat(np.asarray(values_month, dtype=float), days_month, axis=-1)
+
+
+def month_of_day(day_idx, days_month):
+    """Indeks miesiąca (0..11) dla indeksu dnia liczonego od początku symulacji."""
+    ends = np.cumsum(days_month)
+    return np.searchsorted(ends, day_idx, side="right")
+
+
+def _soc_1d(delta, batt, soc0, floor=None):
+    # Skumulowana suma z resetem w punktach obcięcia – cumsum dodaje sekwencyjnie,
+    # więc każdy odcinek między obcięciami daje dokładnie te same wartości co pętla.
+    out = np.empty_like(delta)
+    n = delta.shape[0]
+    i, base = 0, soc0
+    while i < n:
+        c = np.cumsum(np.concatenate(([base], delta[i:])))[1:]
+        hit = c > batt if floor is None else (c > batt) | (c < floor)
+        over = np.flatnonzero(hit)
+        if over.size == 0:
+            out[i:] = c
+            break
+        j = i + over[0]
+        out[i:j] = c[:j - i]
+        # przy pełnej baterii i nieujemnym bilansie SOC zostaje na batt
+        # (analogicznie: na floor przy niedodatnim bilansie)
+        if c[j - i] > batt:
+            level, stop = batt, np.flatnonzero(delta[j + 1:] < 0)
+        else:
+            level, stop = floor, np.flatnonzero(delta[j + 1:] > 0)
+        k = j + 1 + stop[0] if stop.size else n
+        out[j:k] = level
+        i, base = k, level
+    return out
+
+
+def _soc_2d(delta, batt, soc0, keep_trajectory, floor=None):
+    # Krok po dniach, wektorowo po scenariuszach (te same operacje co w pętli).
+    n_sc, n_days = delta.shape
+    soc = soc0.copy()
+    soc_min = soc0.copy()
+    min_day = np.full(n_sc, -1, dtype=np.int64)
+    traj = np.empty_like(delta) if keep_trajectory else None
+    for d in range(n_days):
+        np.add(soc, delta[:, d], out=soc)
+        np.minimum(soc, batt, out=soc)
+        if floor is not None:
+            np.maximum(soc, floor, out=soc)
+        lower = soc < soc_min
+        np.copyto(soc_min, soc, where=lower)
+        min_day[lower] = d
+        if traj is not None:
+            traj[:, d] = soc
+    return traj, soc_min, min_day
+
+
+def simulate_soc(harvest_mWh_d, consumption_mWh_d, batt_mWh, soc0_mWh=None,
+                 days_month=None, trajectory=True, floor=None):
+    """
+    Symulacja SOC dzień po dniu z obcięciem do batt_mWh.
+
+    harvest_mWh_d, consumption_mWh_d – tablice dzienne (…, dni) lub skalary (broadcast)
+    batt_mWh – pojemność [mWh], skalar lub tablica per scenariusz
+    soc0_mWh – SOC startowy (domyślnie pełna bateria)
+    days_month – długości miesięcy (do wyznaczenia miesiąca minimum; brak → None)
+    trajectory – False: bez pełnej trajektorii (oszczędza pamięć w dużych wsadach)
+    floor – opcjonalne obcięcie od dołu (np. 0.0: bateria nie schodzi poniżej zera,
+            urządzenie stoi do czasu doładowania); domyślnie brak, jak w kalkulatorze
+
+    Zwraca SocResult(soc, soc_min, min_day, min_month); min_day = -1 oznacza,
+    że SOC nigdy nie spadł poniżej startowego (miesiąc minimum = pierwszy miesiąc).
+    """
+    delta = np.subtract(harvest_mWh_d, consumption_mWh_d, dtype=float)
+    if delta.ndim not in (1, 2):
+        raise ValueError("Oczekiwano tablicy 1-D (dni) lub 2-D (scenariusze × dni).")
+    batch = delta.ndim == 2
+    n_sc = delta.shape[0] if batch else 1
+
+    batt = np.broadcast_to(np.asarray(batt_mWh, dtype=float), (n_sc,)).copy()
+    soc0 = batt.copy() if soc0_mWh is None else \
+        np.broadcast_to(np.asarray(soc0_mWh, dtype=float), (n_sc,)).copy()
+
+    if batch:
+        traj, soc_min, min_day = _soc_2d(delta, batt, soc0, trajectory, floor)
+    else:
+        traj = _soc_1d(delta, batt[0], soc0[0], floor)
+        d = int(np.argmin(traj)) if traj.size else -1
+        if d >= 0 and traj[d] < soc0[0]:
+            soc_min, min_day = traj[d:d + 1].copy(), np.array([d])
+        else:
+            soc_min, min_day = soc0.copy(), np.array([-1])
+        if not trajectory:
+            traj = None
+
+    min_month = None
+    if days_month is not None:
+        min_month = np.where(min_day < 0, 0, month_of_day(np.maximum(min_day, 0), days_month))
+
+    if not batch:
+        return SocResult(traj, float(soc_min[0]), int(min_day[0]),
+                         None if min_month is None else int(min_month[0]))
+    return SocResult(traj, soc_min, min_day, min_month)
+
+
+def steady_state(harvest_mWh_d_month, consumption_mWh_d, batt_mWh, days_month, floor=None):
+    """
+    Okresowy stan ustalony SOC dla profilu miesięcznego (dzienny uzysk stały w miesiącu).
+
+    harvest_mWh_d_month – dzienny uzysk per miesiąc (…, 12), od miesiąca startu
+    consumption_mWh_d, batt_mWh – skalary lub tablice (…) (broadcast po scenariuszach)
+    days_month – długości miesięcy w tej samej kolejności
+    floor – jak w simulate_soc (domyślnie brak obcięcia od dołu)
+
+    Miesiąc z n dniami o stałym bilansie d to odwzorowanie s → clamp(s + n·d, L, H);
+    złożenie 12 takich odwzorowań ma tę samą postać, więc punkt stały roku (granica
+    iteracji rok po roku, startując od pełnej baterii) jest jawny: H przy dodatnim bilansie
+    rocznym, L przy ujemnym (bez floor: brak stanu ustalonego, SOC maleje co rok),
+    clamp(batt) przy zerowym. Trajektoria jest monotoniczna w miesiącu, więc minimum
+    roczne to minimum z końców miesięcy. Koszt: kilkadziesiąt operacji na scenariusz.
+
+    Zwraca SteadyState(soc_start, soc_end_month (…, 12), soc_min, min_month, sustainable);
+    sustainable = soc_min > 0 (lub > floor).
+    """
+    d = np.subtract(harvest_mWh_d_month, np.asarray(consumption_mWh_d, dtype=float)[..., None],
+                    dtype=float)
+    batt = np.asarray(batt_mWh, dtype=float)
+    shape = np.broadcast_shapes(d.shape[:-1], batt.shape)
+    d = np.broadcast_to(d, shape + (12,))
+    batt = np.broadcast_to(batt, shape)
+    lo = -np.inf if floor is None else float(floor)
+    # clamp przez ufunc (jak np.clip, bez narzutu opakowania – istotne dla skalarów)
+    clip = lambda x, a, b: np.minimum(np.maximum(x, a), b)
+
+    f = (np.zeros(shape), np.full(shape, -np.inf), np.full(shape, np.inf))
+    for m in range(12):
+        n = days_month[m]
+        # n dni z bilansem d: clamp(s + n·d, clamp(lo + (n-1)·d), clamp(batt + (n-1)·d))
+        dm = d[..., m]
+        A = n * dm
+        L = clip(lo + (n - 1) * dm, lo, batt)
+        H = clip(batt + (n - 1) * dm, lo, batt)
+        f = (f[0] + A, clip(f[1] + A, L, H), clip(f[2] + A, L, H))
+    A, L, H = f
+    s0 = np.where(A > 0, H, np.where(A < 0, L, clip(batt, L, H)))
+
+    ends = np.empty(shape + (12,))
+    s = s0
+    with np.errstate(invalid="ignore"):
+        for m in range(12):
+            s = clip(s + days_month[m] * d[..., m], lo, batt)
+            ends[..., m] = s
+    soc_min = ends.min(axis=-1)
+    min_month = np.argmin(ends, axis=-1)
+    sustainable = soc_min > (0.0 if floor is None else floor)
+    if not shape:
+        return SteadyState(float(s0), ends, float(soc_min), int(min_month), bool(sustainable))
+    return SteadyState(s0, ends, soc_min, min_month, sustainable)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Model kalkulatora 1S Li-Ion/LiPo + PV (solar_runtime_calc_v4.py bez input()/print()).
+
+- Funkcje modelu przyjmują skalary lub tablice NumPy (solar_sweep, weather_mc, duty_cycle…);
+  ścieżki skalarne liczone w czystym Pythonie, NumPy ładowany dopiero przy tablicach
+  i w symulacji sezonowej (soc_sim) → import modułu bez NumPy (< 50 ms).
+- simulate_profile(): roczny profil BEST/WORST na poziomie modułu (wcześniej domknięcie w main()).
+- evaluate(): cały raport kalkulatora dla jednego scenariusza jako słownik (wartości jak
+  w raporcie tekstowym); wsadowo: batch.py solar (JSONL stdin → stdout).
+"""
+
+import math
+
+from cell_model import U_CUTOFF, U_FULL, U_SAFE, get_cell
+from instrument import Profiler
+from result_cache import cached
+
+V_SYS = 3.0  # napięcie systemowe urządzenia [V]
+CELL = "fw"  # typ ogniwa (cell_model.CELLS) – frakcja pojemności z krzywej OCV
+
+# PSH orientacyjne dla środka PL: Jan..Dec
+BASE_PSH_MONTH = [0.5, 1.0, 2.5, 3.5, 4.5, 5.0, 5.0, 4.5, 3.0, 2.0, 1.0, 0.5]
+DAYS_IN_MONTH  = [31,  28,  31,  30,  31,  30,  31,  31,  30,  31,  30,  31]
+MONTH_NAMES_PL = ["sty", "lut", "mar", "kwi", "maj", "cze", "lip", "sie", "wrz", "paź", "lis", "gru"]
+
+_NO_PROFILE = Profiler()
+
+
+def _is_scalar(x):
+    return isinstance(x, (int, float)) or getattr(x, "ndim", None) == 0
+
+
+def rotate(lst, start_idx):
+    # przesuwa listę tak, by element o indeksie start_idx stał się pierwszym
+    return lst[start_idx:] + lst[:start_idx]
+
+
+# --- Model (funkcje przyjmują skalary lub tablice NumPy) ---
+
+def consumption_mWh_day(current_mA, v_sys=V_SYS):
+    return current_mA * v_sys * 24.0  # mA*V*24 -> mWh/d
+
+
+def battery_mWh(capacity_mAh, v_sys=V_SYS):
+    batt_Wh = capacity_mAh * v_sys / 1000.0
+    return batt_Wh * 1000.0
+
+
+def avg_psh_year(psh_month=BASE_PSH_MONTH, days_month=DAYS_IN_MONTH):
+    return sum(psh_month[i] * days_month[i] for i in range(12)) / 365.0
+
+
+def break_even_panel_W(consumption_mWh_d, eff, psh_year=None):
+    """Minimalna moc panelu [W], przy której średnio-roczny bilans wynosi zero."""
+    psh_year = avg_psh_year() if psh_year is None else psh_year
+    if _is_scalar(eff):
+        return (consumption_mWh_d / (1000.0 * psh_year * eff)) if psh_year>0 and eff>0 else float('inf')
+    import numpy as np
+    eff = np.asarray(eff, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_min = consumption_mWh_d / (1000.0 * psh_year * eff)
+    return np.where((psh_year > 0) & (eff > 0), p_min, np.inf)
+
+
+@cached("dark_streak/1")
+def dark_streak(p_panel_W, consumption_mWh_d, dark_days, sun_hours_dark, eff_dark_pct):
+    """Zwraca (uzysk w ciemny dzień, deficyt dzienny, wymagany bufor) [mWh]."""
+    harvest_dark_mWh_d = p_panel_W * 1000.0 * sun_hours_dark * (eff_dark_pct/100.0)
+    deficit_dark_mWh_d = consumption_mWh_d - harvest_dark_mWh_d
+    if _is_scalar(deficit_dark_mWh_d):
+        deficit_dark_mWh_d = 0.0 if deficit_dark_mWh_d <= 0.0 else float(deficit_dark_mWh_d)
+    else:
+        import numpy as np
+        deficit_dark_mWh_d = np.maximum(0.0, deficit_dark_mWh_d)
+    return harvest_dark_mWh_d, deficit_dark_mWh_d, deficit_dark_mWh_d * dark_days
+
+
+def hours_until_empty(cap_mAh, balance_mWh_per_day, v_sys=V_SYS):
+    """Autonomia [h] przy ujemnym średnim bilansie dziennym (inf, gdy bilans ≥ 0)."""
+    if balance_mWh_per_day >= 0:
+        return float('inf')
+    energy_mWh = cap_mAh * v_sys
+    days = energy_mWh / (-balance_mWh_per_day)
+    return days * 24.0  # godziny
+
+
+@cached("profile_soc/1")
+def profile_soc(harvest_day_m, consumption_mWh_d, batt_mWh, days_month=DAYS_IN_MONTH):
+    """Symulacja roku (start: pełna bateria) + stan ustalony → (SOC min, miesiąc min, SOC końca miesięcy, SteadyState)."""
+    from soc_sim import daily_series, simulate_soc, steady_state
+    res = simulate_soc(daily_series(harvest_day_m, days_month), consumption_mWh_d, batt_mWh,
+                       days_month=days_month)
+    month_end = res.soc[[sum(days_month[:m + 1]) - 1 for m in range(12)]]
+    ss = steady_state(harvest_day_m, consumption_mWh_d, batt_mWh, days_month)
+    return res.soc_min, res.min_month, tuple(float(x) for x in month_end), ss
+
+
+def simulate_profile(p_panel_W, eff, consumption_mWh_d, batt_mWh, names, psh, days):
+    """
+    Profil roczny dla sprawności eff (miesiące od startu: names/psh/days).
+    Zwraca (SOC min [mWh], nazwa miesiąca min, wiersze tabeli miesięcznej, SteadyState).
+    """
+    # uzysk dzienny per miesiąc → seria dzienna; SOC z obcięciem do batt_mWh (start: pełne naładowanie)
+    harvest_day_m = [p_panel_W * 1000.0 * psh[m] * eff for m in range(12)]
+    soc_min, min_month, month_end, ss = profile_soc(harvest_day_m, consumption_mWh_d, batt_mWh, days)
+    rows = []  # (name, psh, harvest_day, harvest_mon, cons_mon, balance_mon, soc_end_pct)
+    for m in range(12):
+        harvest_day = harvest_day_m[m]
+        harvest_mon = harvest_day * days[m]
+        cons_mon    = consumption_mWh_d * days[m]
+        balance_mon = harvest_mon - cons_mon
+        soc_end_pct = 100.0 * float(month_end[m]) / batt_mWh if batt_mWh > 0 else 0.0
+        rows.append((names[m], psh[m], harvest_day, harvest_mon, cons_mon, balance_mon, soc_end_pct))
+    return soc_min, names[min_month], rows, ss
+
+
+_ROW_KEYS = ("month", "psh", "harvest_mWh_d", "harvest_mWh", "consumption_mWh", "balance_mWh", "soc_end_pct")
+
+
+def _profile_dict(soc_min, month, rows, ss, batt_mWh, names):
+    steady = float(ss.soc_min)
+    return {
+        "soc_min_mWh": float(soc_min),
+        "soc_min_pct": (100.0 * soc_min / batt_mWh) if batt_mWh > 0 else 0.0,
+        "min_month": month,
+        "steady_soc_min_mWh": steady,
+        "steady_soc_min_pct": (100.0 * steady / batt_mWh) if batt_mWh > 0 else 0.0,
+        "steady_min_month": names[int(ss.min_month)] if math.isfinite(steady) else None,
+        "months": [dict(zip(_ROW_KEYS, r)) for r in rows],
+    }
+
+
+def evaluate(current_mA=0.162, capacity_mAh=500, p_panel_W=0.15, eff_best_pct=20, eff_worst_pct=5,
+             start_month=7, dark_days=14, sun_hours_dark=0.0, eff_dark_pct=5,
+             psh_month=BASE_PSH_MONTH, cell=CELL, prof=None):
+    """
+    Raport kalkulatora dla jednego scenariusza (domyślne = wartości ENTER z trybu interaktywnego).
+    psh_month: 12 średnich PSH sty..gru (np. irradiance.site_psh_month()).
+    prof: instrument.Profiler – etapy modelu i liczniki (opcjonalnie).
+    """
+    prof = prof or _NO_PROFILE
+    if not 1 <= int(start_month) <= 12:
+        raise ValueError("start_month musi być w zakresie 1-12.")
+    if len(psh_month) != 12:
+        raise ValueError("psh_month: potrzebne 12 wartości (sty..gru).")
+    base_psh_month = list(psh_month)
+    v_sys = V_SYS  # stałe
+
+    # Frakcje pojemności (krzywa OCV ogniwa 4.2→3.0 V)
+    prof.stage("battery")
+    cell = get_cell(cell)
+    cap_safe_mAh    = capacity_mAh * cell.charge_fraction(U_FULL, U_SAFE)
+    cap_cutoff_mAh  = capacity_mAh * cell.charge_fraction(U_FULL, U_CUTOFF)
+
+    # Obciążenie i bateria
+    consumption_mWh_d = consumption_mWh_day(current_mA, v_sys)
+    batt_mWh = battery_mWh(capacity_mAh, v_sys)
+
+    # PV – profil sezonowy (PSH/dzień) i rotacja tak, by start_month był pierwszym (1->indeks 0)
+    prof.stage("pv_average")
+    idx0 = (int(start_month) - 1) % 12
+    psh_rot   = rotate(base_psh_month, idx0)
+    days_rot  = rotate(DAYS_IN_MONTH, idx0)
+    names_rot = rotate(MONTH_NAMES_PL, idx0)
+
+    eff_best   = eff_best_pct  / 100.0
+    eff_worst  = eff_worst_pct / 100.0
+
+    # Zliczanie średnich uzysków (BEST i WORST); SOC liczy symulator sezonowy niżej
+    total_harvest_best = 0.0
+    total_harvest_worst = 0.0
+    total_days = sum(days_rot)
+
+    for m in range(12):
+        daily_harvest_best  = p_panel_W * 1000.0 * psh_rot[m] * eff_best
+        daily_harvest_worst = p_panel_W * 1000.0 * psh_rot[m] * eff_worst
+        total_harvest_best  += daily_harvest_best  * days_rot[m]
+        total_harvest_worst += daily_harvest_worst * days_rot[m]
+
+    avg_harvest_best_mWh_d  = total_harvest_best  / total_days
+    avg_harvest_worst_mWh_d = total_harvest_worst / total_days
+
+    def coverage(harvest_mWh_day):
+        return 100.0 * harvest_mWh_day / consumption_mWh_d if consumption_mWh_d > 0 else 0.0
+
+    bal_best_mWh  = avg_harvest_best_mWh_d  - consumption_mWh_d
+    bal_worst_mWh = avg_harvest_worst_mWh_d - consumption_mWh_d
+
+    # Próg ‘na zero’ – minimalna moc panelu z rocznej średniej PSH (dla BEST i WORST)
+    prof.stage("break_even")
+    psh_year = avg_psh_year(base_psh_month, DAYS_IN_MONTH)
+
+    # Dark-streak (N ciemnych dni)
+    prof.stage("dark_streak")
+    harvest_dark_mWh_d, deficit_dark_mWh_d, need_buffer_mWh = dark_streak(
+        p_panel_W, consumption_mWh_d, dark_days, sun_hours_dark, eff_dark_pct)
+
+    # Sezonowy symulator (dzień po dniu, BEST/WORST)
+    prof.stage("simulate_best")
+    best = simulate_profile(p_panel_W, eff_best, consumption_mWh_d, batt_mWh, names_rot, psh_rot, days_rot)
+    prof.stage("simulate_worst")
+    worst = simulate_profile(p_panel_W, eff_worst, consumption_mWh_d, batt_mWh, names_rot, psh_rot, days_rot)
+    prof.count("scenarios", 2)
+    prof.count("days_simulated", 2 * total_days)
+
+    return {
+        "current_mA": current_mA, "capacity_mAh": capacity_mAh, "p_panel_W": p_panel_W,
+        "eff_best_pct": eff_best_pct, "eff_worst_pct": eff_worst_pct, "start_month": int(start_month),
+        "v_sys": v_sys, "consumption_mWh_d": consumption_mWh_d,
+        "batt_mWh": batt_mWh,
+        "daily_pct": 100.0 * consumption_mWh_d / batt_mWh if batt_mWh > 0 else 0.0,
+        "cap_safe_mAh": cap_safe_mAh, "cap_cutoff_mAh": cap_cutoff_mAh,
+        "time_safe_h": cap_safe_mAh / current_mA if current_mA > 0 else float('inf'),
+        "time_cutoff_h": cap_cutoff_mAh / current_mA if current_mA > 0 else float('inf'),
+        "start_label": names_rot[0],
+        "avg_harvest_best_mWh_d": avg_harvest_best_mWh_d, "cov_best_pct": coverage(avg_harvest_best_mWh_d),
+        "bal_best_mWh_d": bal_best_mWh,
+        "avg_harvest_worst_mWh_d": avg_harvest_worst_mWh_d, "cov_worst_pct": coverage(avg_harvest_worst_mWh_d),
+        "bal_worst_mWh_d": bal_worst_mWh,
+        # autonomia „przy ujemnym bilansie” – z BILANSU ŚREDNIEGO (informacyjnie)
+        "autonomy_h": {
+            "best_safe": hours_until_empty(cap_safe_mAh, bal_best_mWh, v_sys),
+            "best_cutoff": hours_until_empty(cap_cutoff_mAh, bal_best_mWh, v_sys),
+            "worst_safe": hours_until_empty(cap_safe_mAh, bal_worst_mWh, v_sys),
+            "worst_cutoff": hours_until_empty(cap_cutoff_mAh, bal_worst_mWh, v_sys),
+        },
+        "p_min_best_W": break_even_panel_W(consumption_mWh_d, eff_best, psh_year),
+        "p_min_worst_W": break_even_panel_W(consumption_mWh_d, eff_worst, psh_year),
+        "dark_days": dark_days, "harvest_dark_mWh_d": harvest_dark_mWh_d,
+        "deficit_dark_mWh_d": deficit_dark_mWh_d, "need_buffer_mWh": need_buffer_mWh,
+        "dark_ok": batt_mWh >= need_buffer_mWh,
+        "best": _profile_dict(*best, batt_mWh, names_rot),
+        "worst": _profile_dict(*worst, batt_mWh, names_rot),
+    }
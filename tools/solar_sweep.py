@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nieinteraktywny sweep parametrów i dobór PV + ogniwa (model z solar_runtime_calc_v4.py).
+
+Tryby:
+  sweep – siatka p_panel_W × capacity_mAh × current_mA × sprawność × start_month,
+          rozdzielona na procesy; wynik: tabela CSV (min SOC, najgorszy miesiąc,
+          status dark-streak, moc panelu ‘na zero’, min SOC w stanie ustalonym – kolejne lata;
+          ujemny bilans roczny = rozładowanie: soc_ss_pct 0, worst_month_ss 0).
+  solve – bisekcja (wektorowo po scenariuszach): najmniejszy panel przy zadanym ogniwie
+          i najmniejsze ogniwo przy zadanym panelu, tak by soc_min > 0 przez cały rok
+          (--steady: także w kolejnych latach, wg soc_sim.steady_state).
+
+Siatki: lista "0.05,0.1,0.2" lub zakres "start:stop:krok" (stop włącznie).
+--irradiance plik.csv: średnie miesięczne PSH z godzinowego CSV (PVGIS/TMY, patrz irradiance.py)
+zamiast BASE_PSH_MONTH.
+Wyniki sweepa zapamiętywane per punkt siatki (result_cache.PointCache, --cache-dir lub
+CALC_CACHE_DIR) → powtórzony / rozszerzony sweep liczy tylko nowe punkty.
+
+Przykład:
+  python tools/solar_sweep.py sweep --panel 0.05:0.5:0.01 --capacity 200:3000:100 \\
+      --current 0.1,0.162,0.25 --eff 5,10,20 --start-month 1:12:1 -o wyniki.csv
+  python tools/solar_sweep.py solve --current 0.162 --eff 5 --capacity 500 --panel 0.15
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import result_cache
+from result_cache import PointCache
+from soc_sim import daily_series, simulate_soc, steady_state
+from solar_model import (BASE_PSH_MONTH, DAYS_IN_MONTH, avg_psh_year, battery_mWh, break_even_panel_W,
+                         consumption_mWh_day, dark_streak)
+
+CHUNK = 4096          # scenariuszy na zadanie (≈ 12 MB na tablicę dzienną)
+BISECT_ITERS = 40     # kroków bisekcji (zawężenie przedziału ~1e-12 względnie)
+
+COLUMNS = ["p_panel_W", "capacity_mAh", "current_mA", "eff_pct", "start_month",
+           "soc_min_mWh", "soc_min_pct", "worst_month", "dark_ok", "p_break_even_W",
+           "soc_ss_pct", "worst_month_ss"]
+SWEEP_TAG = "solar_sweep/2"    # zmiana modelu → nowy znacznik (stare punkty nieużywane)
+_INT_COLUMNS = {"worst_month": np.int64, "dark_ok": bool, "worst_month_ss": np.int64}
+
+
+def parse_grid(spec):
+    """'a,b,c' lub 'start:stop:krok' (stop włącznie) → tablica float."""
+    spec = spec.replace(" ", "")
+    if ":" in spec:
+        start, stop, step = (float(x.replace(",", ".")) for x in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"Krok siatki musi być > 0: {spec}")
+        n = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return start + step * np.arange(max(n, 0))
+    return np.array([float(x) for x in spec.split(",") if x])
+
+
+def psh_daily_by_start(psh_month=BASE_PSH_MONTH, days_month=DAYS_IN_MONTH):
+    """Tablica 12 × 365: dzienny PSH dla startu w miesiącu 1..12 (wiersz = start_month-1)."""
+    base = daily_series(psh_month, days_month)
+    offsets = np.concatenate(([0], np.cumsum(days_month)[:-1]))
+    return np.stack([np.roll(base, -int(o)) for o in offsets])
+
+
+def _soc_min(p_panel_W, capacity_mAh, current_mA, eff, start_month, psh_rot):
+    # p * 1000 * psh * eff – ta sama kolejność działań co w solar_runtime_calc_v4.py
+    harvest = (p_panel_W * 1000.0)[:, None] * psh_rot[start_month - 1] * eff[:, None]
+    res = simulate_soc(harvest, consumption_mWh_day(current_mA)[:, None],
+                       battery_mWh(capacity_mAh), days_month=DAYS_IN_MONTH, trajectory=False)
+    return res.soc_min, res.min_month
+
+
+def _soc_min_steady(p_panel_W, capacity_mAh, current_mA, eff, start_month, psh_month):
+    # stan ustalony z agregatów miesięcznych (bez serii dziennej)
+    rot = (np.arange(12) + (start_month - 1)[:, None]) % 12
+    harvest = (p_panel_W * 1000.0)[:, None] * np.asarray(psh_month, float)[rot] * eff[:, None]
+    days = np.asarray(DAYS_IN_MONTH)[rot]
+    # długości miesięcy zależą od startu → grupy po start_month
+    soc_min = np.empty(p_panel_W.size)
+    min_month = np.empty(p_panel_W.size, dtype=np.int64)
+    for s in np.unique(start_month):
+        m = start_month == s
+        ss = steady_state(harvest[m], consumption_mWh_day(current_mA[m]), battery_mWh(capacity_mAh[m]),
+                          days[m][0])
+        soc_min[m], min_month[m] = ss.soc_min, ss.min_month
+    return soc_min, min_month
+
+
+def _sweep_chunk(args):
+    p, cap, cur, eff_pct, start, dark, psh_month = args
+    psh_rot = psh_daily_by_start(psh_month)
+    eff = eff_pct / 100.0
+    soc_min, min_month = _soc_min(p, cap, cur, eff, start, psh_rot)
+    batt = battery_mWh(cap)
+    cons = consumption_mWh_day(cur)
+    _, _, need = dark_streak.uncached(p, cons, *dark)
+    worst = (start - 1 + min_month) % 12 + 1
+    ss_min, ss_month = _soc_min_steady(p, cap, cur, eff, start, psh_month)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        soc_pct = np.where(batt > 0, 100.0 * soc_min / batt, 0.0)
+        ss_pct = np.where(batt > 0, 100.0 * ss_min / batt, 0.0)
+    # brak stanu ustalonego (SOC maleje co rok) → rozładowanie: 0 %, bez najgorszego miesiąca
+    drained = ~np.isfinite(ss_min)
+    ss_pct = np.where(drained, 0.0, ss_pct)
+    ss_worst = np.where(drained, 0, (start - 1 + ss_month) % 12 + 1)
+    return (soc_min, soc_pct, worst, batt >= need, break_even_panel_W(cons, eff, avg_psh_year(psh_month)),
+            ss_pct, ss_worst)
+
+
+def _solve_chunk(args):
+    what, p, cap, cur, eff_pct, start, psh_month, steady = args
+    psh_rot = psh_daily_by_start(psh_month)
+    eff = eff_pct / 100.0
+
+    def ok(x):
+        pp, cc = (x, cap) if what == "panel" else (p, x)
+        if steady:
+            return _soc_min_steady(pp, cc, cur, eff, start, psh_month)[0] > 0
+        return _soc_min(pp, cc, cur, eff, start, psh_rot)[0] > 0
+
+    # górna granica: podwajanie aż do spełnienia warunku (lub limitu → inf)
+    lo = np.zeros_like(cur)
+    hi = np.where(what == "panel", p, cap).astype(float)
+    hi = np.where(hi > 0, hi, 1.0)
+    limit = 1e3 if what == "panel" else 1e7
+    good = ok(hi)
+    while not good.all() and (hi[~good] < limit).any():
+        hi = np.where(good, hi, hi * 2.0)
+        good = ok(hi)
+    for _ in range(BISECT_ITERS):
+        mid = 0.5 * (lo + hi)
+        m_ok = ok(mid)
+        hi = np.where(m_ok, mid, hi)
+        lo = np.where(m_ok, lo, mid)
+    return np.where(good, hi, np.inf)
+
+
+def _chunks(n, size=CHUNK):
+    return [slice(i, min(i + size, n)) for i in range(0, n, size)]
+
+
+def _run(func, jobs, workers):
+    if workers == 1 or len(jobs) == 1:
+        return [func(j) for j in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(func, jobs))
+
+
+def sweep(panel_W, capacity_mAh, current_mA, eff_pct, start_month,
+          dark_days=14, sun_hours_dark=0.0, eff_dark_pct=5, workers=None,
+          psh_month=BASE_PSH_MONTH):
+    """Pełna siatka kartezjańska; zwraca słownik kolumn (tablice NumPy) wg COLUMNS."""
+    grids = np.meshgrid(np.asarray(panel_W, float), np.asarray(capacity_mAh, float),
+                        np.asarray(current_mA, float), np.asarray(eff_pct, float),
+                        np.asarray(start_month, int), indexing="ij")
+    p, cap, cur, eff, start = (g.ravel() for g in grids)
+    if ((start < 1) | (start > 12)).any():
+        raise ValueError("start_month musi być w zakresie 1-12.")
+    dark = (dark_days, sun_hours_dark, eff_dark_pct)
+    params = np.column_stack((p, cap, cur, eff, start))
+    cache = PointCache(SWEEP_TAG, (dark, psh_month))
+    found, vals = cache.lookup(params)
+    if vals is None:
+        vals = np.empty((p.size, len(COLUMNS) - 5))
+    todo = np.flatnonzero(~found)
+    if todo.size:
+        q, c, i, e, st = (a[todo] for a in (p, cap, cur, eff, start))
+        jobs = [(q[s], c[s], i[s], e[s], st[s], dark, psh_month) for s in _chunks(todo.size)]
+        parts = _run(_sweep_chunk, jobs, workers or os.cpu_count() or 1)
+        new = np.column_stack([np.concatenate(col) for col in zip(*parts)])
+        vals[todo] = new
+        cache.store(params[todo], new)
+    out = dict(zip(COLUMNS[:5], (p, cap, cur, eff, start)))
+    for k, name in enumerate(COLUMNS[5:]):
+        out[name] = vals[:, k].astype(_INT_COLUMNS.get(name, np.float64))
+    return out
+
+
+def solve(current_mA, eff_pct, start_month, capacity_mAh=None, panel_W=None, workers=None,
+          psh_month=BASE_PSH_MONTH, steady=False):
+    """
+    Bisekcja najmniejszego panelu [W] (przy capacity_mAh) i/lub najmniejszego ogniwa [mAh]
+    (przy panel_W), dla których soc_min > 0 (steady=True: w stanie ustalonym, kolejne lata).
+    Parametry mogą być tablicami (broadcast).
+    Zwraca słownik: 'min_panel_W' i/lub 'min_capacity_mAh' (inf = brak rozwiązania).
+    """
+    cur, eff, start, cap, p = np.broadcast_arrays(
+        np.asarray(current_mA, float), np.asarray(eff_pct, float), np.asarray(start_month, int),
+        np.asarray(np.nan if capacity_mAh is None else capacity_mAh, float),
+        np.asarray(np.nan if panel_W is None else panel_W, float))
+    shape = cur.shape
+    cur, eff, start, cap, p = (a.ravel() for a in (cur, eff, start, cap, p))
+    out = {}
+    for what, given, key in (("panel", capacity_mAh, "min_panel_W"),
+                             ("capacity", panel_W, "min_capacity_mAh")):
+        if given is None:
+            continue
+        jobs = [(what, p[s], cap[s], cur[s], eff[s], start[s], psh_month, steady)
+                for s in _chunks(cur.size)]
+        out[key] = np.concatenate(_run(_solve_chunk, jobs, workers or os.cpu_count() or 1)).reshape(shape)
+    return out
+
+
+def write_csv(cols, path):
+    fh = sys.stdout if path in (None, "-") else open(path, "w", newline="")
+    try:
+        w = csv.writer(fh)
+        w.writerow(COLUMNS)
+        fmt = ["{:.4g}", "{:.0f}", "{:.4g}", "{:.4g}", "{:d}",
+               "{:.1f}", "{:.1f}", "{:d}", "{:d}", "{:.4f}", "{:.1f}", "{:d}"]
+        data = [cols[c].tolist() for c in COLUMNS]
+        for row in zip(*data):
+            w.writerow([f.format(int(v) if f == "{:d}" else v) for f, v in zip(fmt, row)])
+    finally:
+        if fh is not sys.stdout:
+            fh.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sweep / dobór PV + ogniwa (model solar_runtime_calc_v4).")
+    sub = ap.add_subparsers(dest="mode", required=True)
+    for name in ("sweep", "solve"):
+        sp = sub.add_parser(name)
+        sp.add_argument("--current", default="0.162", help="średni prąd [mA]")
+        sp.add_argument("--eff", default="5", help="sprawność całkowita [%%]")
+        sp.add_argument("--start-month", default="7", help="miesiąc startu 1-12")
+        sp.add_argument("--panel", default="0.15" if name == "sweep" else None, help="moc panelu [W]")
+        sp.add_argument("--capacity", default="500" if name == "sweep" else None, help="pojemność [mAh]")
+        sp.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie: CPU)")
+        sp.add_argument("-o", "--output", default="-", help="plik CSV (domyślnie stdout)")
+        sp.add_argument("--irradiance", default=None, help="godzinowy CSV PVGIS/TMY dla lokalizacji")
+        sp.add_argument("--cache-dir", default=None, help="katalog pamięci wyników (domyślnie CALC_CACHE_DIR)")
+        if name == "sweep":
+            sp.add_argument("--dark-days", type=float, default=14)
+            sp.add_argument("--sun-hours-dark", type=float, default=0.0)
+            sp.add_argument("--eff-dark", type=float, default=5)
+        else:
+            sp.add_argument("--steady", action="store_true",
+                            help="kryterium w stanie ustalonym (kolejne lata), nie tylko 1. rok")
+    a = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if a.cache_dir:
+        result_cache.DEFAULT.disk_dir = a.cache_dir
+    psh_month = BASE_PSH_MONTH
+    if a.irradiance:
+        from irradiance import site_psh_month
+        psh_month = site_psh_month(a.irradiance)
+    if a.mode == "sweep":
+        cols = sweep(parse_grid(a.panel), parse_grid(a.capacity), parse_grid(a.current),
+                     parse_grid(a.eff), parse_grid(a.start_month).astype(int),
+                     a.dark_days, a.sun_hours_dark, a.eff_dark, workers=a.workers,
+                     psh_month=psh_month)
+        write_csv(cols, a.output)
+        n = cols["p_panel_W"].size
+    else:
+        if a.panel is None and a.capacity is None:
+            ap.error("solve: podaj --capacity (szukany panel) i/lub --panel (szukane ogniwo).")
+        grids = np.meshgrid(parse_grid(a.current), parse_grid(a.eff),
+                            parse_grid(a.start_month).astype(int), indexing="ij")
+        cur, eff, start = (g.ravel() for g in grids)
+        cap = None if a.capacity is None else float(a.capacity.replace(",", "."))
+        p = None if a.panel is None else float(a.panel.replace(",", "."))
+        res = solve(cur, eff, start, capacity_mAh=cap, panel_W=p, workers=a.workers,
+                    psh_month=psh_month, steady=a.steady)
+        fh = sys.stdout if a.output == "-" else open(a.output, "w", newline="")
+        w = csv.writer(fh)
+        keys = list(res)
+        w.writerow(["current_mA", "eff_pct", "start_month"] + keys)
+        for i in range(cur.size):
+            w.writerow([f"{cur[i]:.4g}", f"{eff[i]:.4g}", int(start[i])] +
+                       [f"{res[k][i]:.4f}" for k in keys])
+        if fh is not sys.stdout:
+            fh.close()
+        n = cur.size
+    print(f"[{a.mode}] {n} scenariuszy w {time.perf_counter() - t0:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# Narzędzia w tools/ to płaskie moduły (bez pakietu) – testy importują je jak skrypty.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from bthome_decode import DecodeError, decode, decode_batch, encode, local_name, split_length_prefixed
+
+
+def _records(frames):
+    return b"".join(bytes([len(f)]) + f for f in frames)
+
+
+# kolejność obiektów jak w setup(); skrajne wartości zakresów
+@pytest.mark.parametrize("t, v, b, c", [(21.37, 4.123, 93, 1), (-12.5, 3.3, 5, 123456), (-327.68, 0.0, 0, 0),
+                                        (327.67, 65.535, 100, 4294967295), (0.0, 3.7, 42, 7)])
+def test_round_trip(t, v, b, c):
+    d = decode(encode("BT3", t, v, b, c))
+    assert d["temperature"] == pytest.approx(t, abs=0.005)
+    assert d["voltage"] == pytest.approx(v, abs=0.0005)
+    assert d["battery"] == b and d["count"] == c
+
+
+def test_local_name():
+    assert local_name(encode("BT3", 1.0)) == "BT3"
+
+
+def test_batch_matches_single_decode():
+    # flota + jedna reklama o innym układzie + jedna uszkodzona
+    rng = np.random.default_rng(1)
+    temps = np.round(rng.uniform(-30, 40, 1000), 2)
+    vbat = np.round(rng.uniform(3.0, 4.2, 1000), 3)
+    frames = [encode("BT3", t, v, 50, i) for i, (t, v) in enumerate(zip(temps, vbat))]
+    frames += [encode("BT3", 5.0, count=9), b"\x02\x01\x06\x03\x16\xd2"]
+    buf = _records(frames)
+    cols = decode_batch(buf, *split_length_prefixed(buf))
+    assert cols["valid"][:-1].all() and not cols["valid"][-1]
+    assert np.allclose(cols["temperature"][:1000], temps) and np.allclose(cols["voltage"][:1000], vbat)
+    assert cols["count"][1000] == 9 and np.isnan(cols["voltage"][1000])
+    for i in (0, 500, 1000):
+        d = decode(frames[i])
+        assert all(cols[k][i] == d[k] for k in d), (i, d)
+
+
+@pytest.mark.parametrize("adv", [
+    bytes([2, 1, 6, 5, 0x16, 0xD2, 0xFC, 0x40, 0x53]),              # brak bajtu długości
+    bytes([2, 1, 6, 7, 0x16, 0xD2, 0xFC, 0x40, 0x54, 9, 1]),        # długość 9, jest 1 B
+    bytes([2, 1, 6, 6, 0x16, 0xD2, 0xFC, 0x40, 0x02, 0x10]),        # ucięta temperatura
+    bytes([2, 1, 6, 9, 0x16, 0xD2]),                                # ucięta struktura AD
+    bytes([2, 1, 6]),                                               # brak service data
+])
+def test_malformed_raises_decode_error(adv):
+    with pytest.raises(DecodeError):
+        decode(adv)
+
+
+def test_variable_length_object():
+    adv = bytes([2, 1, 6, 11, 0x16, 0xD2, 0xFC, 0x40, 0x53, 3]) + b"abc" + bytes([0x01, 77])
+    assert decode(adv) == {"text": b"abc", "battery": 77}
+
+
+def test_truncated_final_record():
+    f = encode("BT3", 20.0, 3.9, 80, 1)
+    buf = _records([f]) + bytes([40]) + f[:27]
+    with pytest.raises(DecodeError):
+        split_length_prefixed(buf)
+
+
+def test_batch_frame_outside_buffer_is_invalid():
+    f = encode("BT3", 20.0, 3.9, 80, 1)
+    buf = f + f
+    cols = decode_batch(buf, [0, len(f), len(f) + 5], [len(f)] * 3)
+    assert cols["valid"].tolist() == [True, True, False]
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monte Carlo pogody: prawdopodobieństwo przetrwania roku i serie 'ciemnych' dni.
+
+- Dzienny PSH losowany per miesiąc: łańcuch Markowa (pogodnie/pochmurno) daje
+  skorelowane serie dni pochmurnych (średnia długość serii RUN_LEN_MONTH),
+  do tego szum gamma; średnia miesięczna = BASE_PSH_MONTH z solar_model.py.
+- Próby liczone wsadami (wsad × 365 dni) i rozdzielone na procesy; każdy wsad ma
+  własne ziarno z SeedSequence(seed) → wynik nie zależy od liczby procesów.
+- Wyniki zbierane strumieniowo w histogramach o stałym rozmiarze – pamięć nie rośnie
+  z liczbą prób.
+- SOC z obcięciem od dołu do 0 (urządzenie stoi do czasu doładowania);
+  'brown-out' = dzień z SOC <= 0.
+
+Przykład:
+  python tools/weather_mc.py --trials 20000 --capacity 300,500,800,1200 --target 0.99
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from soc_sim import simulate_soc
+from solar_model import BASE_PSH_MONTH, DAYS_IN_MONTH, MONTH_NAMES_PL, battery_mWh, consumption_mWh_day
+from solar_sweep import psh_daily_by_start
+
+# Prawdopodobieństwo dnia pochmurnego i średnia długość serii pochmurnej [dni], Jan..Dec (PL, orientacyjnie)
+P_OVERCAST_MONTH = [0.75, 0.70, 0.60, 0.50, 0.45, 0.40, 0.40, 0.40, 0.50, 0.60, 0.75, 0.80]
+RUN_LEN_MONTH    = [4.0,  3.5,  3.0,  2.5,  2.0,  2.0,  2.0,  2.0,  2.5,  3.0,  4.0,  4.5]
+
+WeatherModel = namedtuple("WeatherModel", "psh_month p_overcast run_len dark_frac cv")
+DEFAULT_WEATHER = WeatherModel(BASE_PSH_MONTH, P_OVERCAST_MONTH, RUN_LEN_MONTH,
+                               dark_frac=0.15, cv=0.3)
+
+DAYS = 365
+MIN_BINS = 201          # histogram min SOC: 0..100% co 0.5%
+CURVE_BINS = 101        # histogram dziennego SOC: 0..100% co 1%
+PERCENTILES = (1, 5, 10, 50, 90, 95, 99)
+
+
+def sample_psh(rng, n_trials, start_month=7, weather=DEFAULT_WEATHER):
+    """Losuje tablicę n_trials × 365 dziennych PSH [h] od miesiąca start_month."""
+    rot = lambda tbl: psh_daily_by_start(tbl)[start_month - 1]
+    mean, p_ov, run = rot(weather.psh_month), rot(weather.p_overcast), rot(weather.run_len)
+    # łańcuch Markowa: p10 = 1/L (koniec serii), p01 z warunku stacjonarności
+    p10 = 1.0 / np.maximum(run, 1.0)
+    p01 = np.minimum(p_ov * p10 / np.maximum(1.0 - p_ov, 1e-9), 1.0)
+    u = rng.random((n_trials, DAYS))
+    over = np.empty((n_trials, DAYS), dtype=bool)
+    over[:, 0] = u[:, 0] < p_ov[0]
+    for d in range(1, DAYS):
+        over[:, d] = np.where(over[:, d - 1], u[:, d] >= p10[d], u[:, d] < p01[d])
+    # średnia PSH w dni pogodne tak, by średnia miesięczna się zgadzała
+    psh_sun = mean * (1.0 - p_ov * weather.dark_frac) / np.maximum(1.0 - p_ov, 1e-9)
+    psh = np.where(over, mean * weather.dark_frac, psh_sun)
+    if weather.cv > 0:
+        k = 1.0 / weather.cv ** 2
+        psh *= rng.gamma(k, 1.0 / k, size=psh.shape)
+    return psh
+
+
+def longest_run(mask):
+    """Najdłuższa seria True w każdym wierszu macierzy bool (wektorowo)."""
+    cs = np.cumsum(mask, axis=1)
+    reset = np.maximum.accumulate(np.where(mask, 0, cs), axis=1)
+    return (cs - reset).max(axis=1)
+
+
+class McStats:
+    """Strumieniowe agregaty wyników (rozmiar niezależny od liczby prób)."""
+
+    def __init__(self):
+        self.trials = 0
+        self.survived = 0
+        self.min_hist = np.zeros(MIN_BINS, dtype=np.int64)
+        self.curve_hist = np.zeros((DAYS, CURVE_BINS), dtype=np.int64)
+        self.brownout_hist = np.zeros(DAYS + 1, dtype=np.int64)
+
+    def add(self, part):
+        n, surv, min_h, curve_h, bo_h = part
+        self.trials += n
+        self.survived += surv
+        self.min_hist += min_h
+        self.curve_hist += curve_h
+        self.brownout_hist += bo_h
+
+    @staticmethod
+    def _pct_from_hist(hist, q, step):
+        cdf = np.cumsum(hist, axis=-1)
+        total = cdf[..., -1:]
+        idx = np.argmax(cdf >= np.ceil(total * q / 100.0), axis=-1)
+        return idx * step
+
+    def report(self, percentiles=PERCENTILES):
+        bo = self.brownout_hist
+        days = np.arange(bo.size)
+        n = max(self.trials, 1)
+        return {
+            "trials": self.trials,
+            "survival": self.survived / n,
+            "soc_min_pct": {f"p{q}": float(self._pct_from_hist(self.min_hist, q, 0.5))
+                            for q in percentiles},
+            "soc_curve_pct": {f"p{q}": self._pct_from_hist(self.curve_hist, q, 1.0).tolist()
+                              for q in (5, 50, 95)},
+            "brownout_days": {
+                "p_any": float(bo[1:].sum() / n),
+                "mean": float((bo * days).sum() / n),
+                "p95": int(self._pct_from_hist(bo, 95, 1)),
+                "max": int(days[bo > 0].max()) if bo.any() else 0,
+                "hist": {int(d): int(c) for d, c in zip(days, bo) if c},
+            },
+        }
+
+
+def _run_batch(args):
+    seed, n, p_panel_W, capacity_mAh, current_mA, eff, start_month, weather = args
+    rng = np.random.default_rng(seed)
+    psh = sample_psh(rng, n, start_month, weather)
+    batt = battery_mWh(capacity_mAh)
+    res = simulate_soc(p_panel_W * 1000.0 * psh * eff, consumption_mWh_day(current_mA),
+                       batt, floor=0.0)
+    soc_pct = 100.0 * res.soc / batt
+    min_pct = 100.0 * res.soc_min / batt
+    min_h = np.bincount(np.clip((min_pct * 2).astype(np.int64), 0, MIN_BINS - 1), minlength=MIN_BINS)
+    bins = np.clip(soc_pct.astype(np.int64), 0, CURVE_BINS - 1)
+    flat = bins + CURVE_BINS * np.arange(DAYS)[None, :]
+    curve_h = np.bincount(flat.ravel(), minlength=DAYS * CURVE_BINS).reshape(DAYS, CURVE_BINS)
+    bo_h = np.bincount(longest_run(res.soc <= 0.0), minlength=DAYS + 1)
+    return n, int((res.soc_min > 0).sum()), min_h, curve_h, bo_h
+
+
+def run_mc(p_panel_W=0.15, capacity_mAh=500, current_mA=0.162, eff_pct=5, start_month=7,
+           trials=10000, batch=1000, seed=0, workers=None, weather=DEFAULT_WEATHER):
+    """Symulacja Monte Carlo; zwraca McStats (agregaty strumieniowe)."""
+    n_batches = -(-trials // batch)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    jobs = [(seeds[i], min(batch, trials - i * batch), p_panel_W, capacity_mAh,
+             current_mA, eff_pct / 100.0, start_month, weather) for i in range(n_batches)]
+    stats = McStats()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for j in jobs:
+            stats.add(_run_batch(j))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for part in ex.map(_run_batch, jobs):
+                stats.add(part)
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte Carlo pogody dla 1S + PV (prawdopodobieństwo przetrwania).")
+    ap.add_argument("--panel", type=float, default=0.15, help="moc panelu [W]")
+    ap.add_argument("--capacity", default="500", help="pojemność [mAh]; lista 'a,b,c' → dobór wg --target")
+    ap.add_argument("--current", type=float, default=0.162, help="średni prąd [mA]")
+    ap.add_argument("--eff", type=float, default=5, help="sprawność całkowita [%%]")
+    ap.add_argument("--start-month", type=int, default=7, choices=range(1, 13))
+    ap.add_argument("--trials", type=int, default=10000)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--target", type=float, default=0.99, help="docelowe prawdopodobieństwo przetrwania")
+    ap.add_argument("--json", action="store_true", help="wynik jako JSON")
+    ap.add_argument("--irradiance", default=None, help="godzinowy CSV PVGIS/TMY – średnie miesięczne PSH lokalizacji")
+    a = ap.parse_args(argv)
+
+    caps = [float(c) for c in a.capacity.split(",") if c]
+    weather = DEFAULT_WEATHER
+    if a.irradiance:
+        from irradiance import site_psh_month
+        weather = weather._replace(psh_month=site_psh_month(a.irradiance))
+    results = {}
+    for cap in caps:
+        # to samo ziarno dla każdej pojemności → wspólne scenariusze pogodowe
+        stats = run_mc(a.panel, cap, a.current, a.eff, a.start_month,
+                       a.trials, a.batch, a.seed, a.workers, weather)
+        results[cap] = stats.report()
+    ok = [c for c in caps if results[c]["survival"] >= a.target]
+    best = min(ok) if ok else None
+
+    if a.json:
+        out = {"capacity_mAh": {str(c): r for c, r in results.items()},
+               "target": a.target, "min_capacity_mAh": best}
+        json.dump(out, sys.stdout, ensure_ascii=False)
+        print()
+        return
+
+    month_ends = np.cumsum(DAYS_IN_MONTH[a.start_month - 1:] + DAYS_IN_MONTH[:a.start_month - 1]) - 1
+    names = MONTH_NAMES_PL[a.start_month - 1:] + MONTH_NAMES_PL[:a.start_month - 1]
+    for cap, r in results.items():
+        bo = r["brownout_days"]
+        print(f"\n[Monte Carlo] ogniwo {cap:.0f} mAh, panel {a.panel:.3f} W, "
+              f"Iavg {a.current:.3f} mA, sprawność {a.eff:.0f}%, prób: {r['trials']}")
+        print(f"Prawdopodobieństwo przetrwania roku: {100.0 * r['survival']:.2f}%")
+        print("Min SOC [%]: " + ", ".join(f"{k}={v:.1f}" for k, v in r["soc_min_pct"].items()))
+        print(f"Brown-out: P(>0 dni)={100.0 * bo['p_any']:.2f}%, średnio {bo['mean']:.2f} d, "
+              f"p95={bo['p95']} d, max={bo['max']} d")
+        print("SOC koniec miesiąca [%] (p5/p50/p95): " + "  ".join(
+            f"{names[m].upper()} {r['soc_curve_pct']['p5'][d]:.0f}/{r['soc_curve_pct']['p50'][d]:.0f}/"
+            f"{r['soc_curve_pct']['p95'][d]:.0f}" for m, d in enumerate(month_ends)))
+    print(f"\nNajmniejsze ogniwo z przetrwaniem >= {100.0 * a.target:.1f}%: "
+          + (f"{best:.0f} mAh" if best is not None else "brak w podanej liście"))
+
+
+if __name__ == "__main__":
+    main()